@@ -3,6 +3,7 @@
 
 from lxml import etree
 
+from . import cli
 from . import controllers
 from . import models
 from . import wizard
@@ -7,7 +7,7 @@
     'description': 'Knowledge management system - Community compatible edition. '
                    'Centralize, manage, share and grow your knowledge library.',
     'category': 'Productivity/Knowledge',
-    'version': '18.0.1.0.0',
+    'version': '18.0.1.2.0',
     'author': 'Syntropy',
     'depends': [
         'web',
@@ -23,6 +23,7 @@
         'data/article_templates.xml',
         'data/digest_data.xml',
         'data/ir_config_parameter_data.xml',
+        'data/ir_cron_data.xml',
         'data/ir_attachment_data.xml',
         'data/knowledge_cover_data.xml',
         'data/knowledge_article_template_category_data.xml',
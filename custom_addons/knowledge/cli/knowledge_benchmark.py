@@ -0,0 +1,249 @@
+# -*- coding: utf-8 -*-
+# Part of Odoo. See LICENSE file for full copyright and licensing details.
+
+import base64
+import logging
+import math
+import optparse
+import random
+import sys
+import time
+
+from itertools import accumulate
+from pathlib import Path
+
+import odoo
+from odoo.cli import Command
+from odoo.modules.registry import Registry
+from odoo.tools import SQL
+
+_logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 500
+PERCENTILES = (50, 90, 95, 99)
+
+
+class KnowledgeCorpusGenerator:
+    """ Generate a realistic corpus of articles: the words of the bodies are
+    drawn from a synthetic vocabulary following a Zipf distribution, so that a
+    few words are very common and most of them are rare, as in real texts. """
+
+    def __init__(self, vocabulary_size=5000, skew=1.1, body_words=500, image_ratio=0.0, image_size=50000, seed=42):
+        self.random = random.Random(seed)
+        self.body_words = body_words
+        self.image_ratio = image_ratio
+        self.image_size = image_size
+        self.vocabulary = self._generate_vocabulary(vocabulary_size)
+        self.cum_weights = list(accumulate(1 / math.pow(rank, skew) for rank in range(1, vocabulary_size + 1)))
+
+    def _generate_vocabulary(self, size):
+        syllables = ['ka', 'lo', 'mi', 'ne', 'ru', 'sa', 'ti', 'vo', 'ze', 'pa', 'qui', 'dor', 'bel', 'fen', 'gar']
+        vocabulary = set()
+        while len(vocabulary) < size:
+            vocabulary.add(''.join(self.random.choices(syllables, k=self.random.randint(2, 4))))
+        return sorted(vocabulary, key=lambda word: (len(word), word))
+
+    def word_at_rank(self, rank):
+        """ Return the word of the given frequency rank (0 being the most common). """
+        return self.vocabulary[min(rank, len(self.vocabulary) - 1)]
+
+    def words(self, count):
+        return self.random.choices(self.vocabulary, cum_weights=self.cum_weights, k=count)
+
+    def title(self):
+        return ' '.join(self.words(self.random.randint(2, 6))).capitalize()
+
+    def body(self):
+        """ Return an HTML body made of headings and paragraphs of about
+        ``body_words`` words, optionally embedding an inline image. """
+        blocks = []
+        remaining = max(int(self.random.gauss(self.body_words, self.body_words / 4)), 1)
+        while remaining > 0:
+            if not blocks or self.random.random() < 0.1:
+                blocks.append('<h2>%s</h2>' % self.title())
+            paragraph_words = min(remaining, self.random.randint(20, 120))
+            blocks.append('<p>%s.</p>' % ' '.join(self.words(paragraph_words)).capitalize())
+            remaining -= paragraph_words
+        if self.random.random() < self.image_ratio:
+            image = base64.b64encode(self.random.randbytes(self.image_size)).decode()
+            blocks.insert(self.random.randint(0, len(blocks)), '<p><img src="data:image/png;base64,%s"></p>' % image)
+        return ''.join(blocks)
+
+    def default_queries(self):
+        """ Return a fixed set of queries covering very common, common and rare
+        words, multi-words queries and a word that is not in the corpus. """
+        size = len(self.vocabulary)
+        return [
+            self.word_at_rank(0),
+            self.word_at_rank(size // 100),
+            self.word_at_rank(size // 2),
+            self.word_at_rank(size - 1),
+            '%s %s' % (self.word_at_rank(1), self.word_at_rank(size // 10)),
+            'unmatchedterm',
+        ]
+
+
+class KnowledgeBenchmark(Command):
+    """ Benchmark the search of the Knowledge command palette on a generated corpus """
+    name = 'knowledge_benchmark'
+
+    def run(self, cmdargs):
+        parser = odoo.tools.config.parser
+        parser.prog = f'{Path(sys.argv[0]).name} {self.name}'
+        group = optparse.OptionGroup(parser, "Knowledge Benchmark Configuration")
+        group.add_option("--articles", dest="articles", type="int", default=1000,
+                         help="Number of articles to generate (default: 1000)")
+        group.add_option("--body-words", dest="body_words", type="int", default=500,
+                         help="Average number of words in the body of the articles (default: 500)")
+        group.add_option("--vocabulary", dest="vocabulary", type="int", default=5000,
+                         help="Number of distinct words in the corpus (default: 5000)")
+        group.add_option("--skew", dest="skew", type="float", default=1.1,
+                         help="Exponent of the Zipf distribution of the words (default: 1.1)")
+        group.add_option("--image-ratio", dest="image_ratio", type="float", default=0.0,
+                         help="Ratio of articles embedding an inline base64 image (default: 0)")
+        group.add_option("--image-size", dest="image_size", type="int", default=50000,
+                         help="Size in bytes of the embedded images (default: 50000)")
+        group.add_option("--queries", dest="queries", default="",
+                         help="Comma-separated queries to run. Default: a fixed set of generated queries")
+        group.add_option("--runs", dest="runs", type="int", default=10,
+                         help="Number of timed runs of each query (default: 10)")
+        group.add_option("--login", dest="login", default="admin",
+                         help="Login of the user running the queries (default: admin)")
+        group.add_option("--report", dest="report", default="knowledge_benchmark_report.txt",
+                         help="Path of the report file (default: knowledge_benchmark_report.txt)")
+        group.add_option("--seed", dest="seed", type="int", default=42,
+                         help="Seed of the corpus generator (default: 42)")
+        group.add_option("--keep", dest="keep", action="store_true", default=False,
+                         help="Commit the generated corpus instead of rolling it back")
+        parser.add_option_group(group)
+        opt = odoo.tools.config.parse_config(cmdargs, setup_logging=True)
+
+        dbname = odoo.tools.config['db_name']
+        if not dbname or ',' in dbname:
+            sys.exit("A single database must be given with -d/--database.")
+
+        generator = KnowledgeCorpusGenerator(
+            vocabulary_size=opt.vocabulary,
+            skew=opt.skew,
+            body_words=opt.body_words,
+            image_ratio=opt.image_ratio,
+            image_size=opt.image_size,
+            seed=opt.seed,
+        )
+        queries = [query.strip() for query in opt.queries.split(',') if query.strip()] or generator.default_queries()
+
+        with Registry(dbname).cursor() as cr:
+            env = odoo.api.Environment(cr, odoo.SUPERUSER_ID, {})
+            user = env['res.users'].search([('login', '=', opt.login)], limit=1)
+            if not user:
+                sys.exit(f"No user found with login {opt.login!r}.")
+            self._generate_corpus(env, generator, opt.articles, user)
+            results = self._run_queries(env(user=user), queries, opt.runs)
+            report = self._format_report(env, opt, results)
+            if opt.keep:
+                cr.commit()
+            else:
+                cr.rollback()
+
+        Path(opt.report).write_text(report, encoding='utf-8')
+        _logger.info("Knowledge benchmark report written to %s", opt.report)
+
+    def _generate_corpus(self, env, generator, article_count, user):
+        """ Create ``article_count`` articles: one root workspace article for
+        each 50 articles, the others being spread randomly under these roots. """
+        Article = env['knowledge.article'].with_context(
+            mail_create_nolog=True, mail_notrack=True, tracking_disable=True)
+        start = time.perf_counter()
+        root_count = max(article_count // 50, 1)
+        roots = Article.create([{
+            'name': generator.title(),
+            'body': generator.body(),
+            'internal_permission': 'write',
+            'is_article_visible_by_everyone': index % 2 == 0,  # half of the roots are hidden
+            'article_member_ids': [(0, 0, {'partner_id': user.partner_id.id, 'permission': 'write'})],
+        } for index in range(root_count)])
+
+        remaining = article_count - root_count
+        while remaining > 0:
+            batch_size = min(remaining, BATCH_SIZE)
+            Article.create([{
+                'name': generator.title(),
+                'body': generator.body(),
+                'parent_id': generator.random.choice(roots).id,
+            } for _ in range(batch_size)])
+            remaining -= batch_size
+            _logger.info("Generated %s/%s articles", article_count - remaining, article_count)
+        Article.flush_model()
+        env.cr.execute("ANALYZE knowledge_article")
+        _logger.info("Corpus generated in %.1fs", time.perf_counter() - start)
+
+    def _run_queries(self, env, queries, runs):
+        """ Run each query through ``get_user_sorted_articles`` in normal and
+        hidden mode, and capture the latencies and the plan of the query. """
+        Article = env['knowledge.article']
+        results = []
+        for query in queries:
+            for hidden_mode in (False, True):
+                Article.get_user_sorted_articles(query, hidden_mode=hidden_mode)  # warm up
+                timings = []
+                for _run in range(runs):
+                    env.invalidate_all()
+                    start = time.perf_counter()
+                    matches = Article.get_user_sorted_articles(query, hidden_mode=hidden_mode)
+                    timings.append((time.perf_counter() - start) * 1000)
+                env.cr.execute(SQL(
+                    "EXPLAIN (ANALYZE, BUFFERS) %s",
+                    Article._get_user_sorted_articles_query(
+                        query, Article._get_user_sorted_articles_domain(hidden_mode), 40),
+                ))
+                results.append({
+                    'query': query,
+                    'hidden_mode': hidden_mode,
+                    'matches': len(matches),
+                    'timings': sorted(timings),
+                    'plan': '\n'.join(line for line, in env.cr.fetchall()),
+                })
+        return results
+
+    def _format_report(self, env, opt, results):
+        env.cr.execute("""
+            SELECT COUNT(*),
+                   COALESCE(AVG(OCTET_LENGTH(body)), 0),
+                   pg_total_relation_size('knowledge_article'),
+                   pg_indexes_size('knowledge_article')
+              FROM knowledge_article
+        """)
+        article_count, avg_body_size, table_size, indexes_size = env.cr.fetchone()
+        lines = [
+            "Knowledge search benchmark",
+            "==========================",
+            "",
+            f"Generated articles: {opt.articles} (words per body: {opt.body_words}, vocabulary: {opt.vocabulary}, "
+            f"skew: {opt.skew}, image ratio: {opt.image_ratio}, image size: {opt.image_size})",
+            f"Articles in database: {article_count}, average body size: {int(avg_body_size)} bytes",
+            f"Table size: {table_size} bytes, indexes size: {indexes_size} bytes",
+            f"Timed runs per query: {opt.runs}",
+            "",
+            "Latencies (ms)",
+            "--------------",
+            "",
+            "%-30s %-7s %7s %s %9s" % (
+                "query", "hidden", "matches", " ".join("%9s" % f"p{p}" for p in PERCENTILES), "max"),
+        ]
+        for result in results:
+            timings = result['timings']
+            lines.append("%-30s %-7s %7s %s %9.2f" % (
+                result['query'][:30], result['hidden_mode'], result['matches'],
+                " ".join("%9.2f" % self._percentile(timings, p) for p in PERCENTILES),
+                timings[-1],
+            ))
+        lines += ["", "Plans", "-----"]
+        for result in results:
+            lines += ["", f"query: {result['query']!r}, hidden mode: {result['hidden_mode']}", "", result['plan']]
+        return '\n'.join(lines) + '\n'
+
+    @staticmethod
+    def _percentile(sorted_values, percentile):
+        """ Nearest-rank percentile of an already sorted list of values. """
+        rank = math.ceil(len(sorted_values) * percentile / 100)
+        return sorted_values[max(rank - 1, 0)]
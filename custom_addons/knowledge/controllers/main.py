@@ -1,11 +1,15 @@
 # -*- coding: utf-8 -*-
 # Part of Odoo. See LICENSE file for full copyright and licensing details.
 
+import tempfile
 import werkzeug
 
+from werkzeug.wsgi import wrap_file
+
 from odoo import conf, http, tools, _
+from odoo.addons.knowledge.models.knowledge_article import EXPORT_FORMATS
 from odoo.exceptions import AccessError, ValidationError
-from odoo.http import request
+from odoo.http import content_disposition, request, Response
 
 
 class KnowledgeController(http.Controller):
@@ -96,6 +100,32 @@ class KnowledgeController(http.Controller):
             {'session_info': session_info},
         )
 
+    @http.route('/knowledge/article/<int:article_id>/export', type='http', auth='user')
+    def article_export(self, article_id, export_format='html', cursor=None):
+        """ Download the article and its descendants as a zip archive. The
+        archive is written into a temporary file, article by article, and sent
+        from there. For huge subtrees, the response holds a cursor header: the
+        next articles are downloaded by calling this route again with it. """
+        article = request.env['knowledge.article'].search([('id', '=', article_id)])
+        if not article:
+            return werkzeug.exceptions.Forbidden()
+        if export_format not in EXPORT_FORMATS:
+            raise werkzeug.exceptions.BadRequest()
+
+        fileobj = tempfile.TemporaryFile()
+        next_cursor = article._export_subtree(fileobj, export_format=export_format, cursor=cursor)
+        size = fileobj.tell()
+        fileobj.seek(0)
+        filename = article._get_export_file_name(article.name)
+        headers = [
+            ('Content-Type', 'application/zip'),
+            ('Content-Length', size),
+            ('Content-Disposition', content_disposition(f'{filename}.zip')),
+        ]
+        if next_cursor:
+            headers.append(('X-Knowledge-Export-Cursor', next_cursor))
+        return Response(wrap_file(request.httprequest.environ, fileobj), headers=headers, direct_passthrough=True)
+
     # ------------------------
     # Article permission panel
     # ------------------------
@@ -0,0 +1,11 @@
+# -*- coding: utf-8 -*-
+# Part of Odoo. See LICENSE file for full copyright and licensing details.
+
+from odoo import api, SUPERUSER_ID
+
+
+def migrate(cr, version):
+    """ Move the base64 images inlined in the bodies of the articles into
+    attachments, see ``knowledge.article._extract_inline_images``. """
+    env = api.Environment(cr, SUPERUSER_ID, {})
+    env['knowledge.article']._extract_inline_images_from_bodies()
@@ -0,0 +1,20 @@
+# -*- coding: utf-8 -*-
+# Part of Odoo. See LICENSE file for full copyright and licensing details.
+
+from odoo import api, SUPERUSER_ID
+from odoo.tools import split_every
+
+
+def migrate(cr, version):
+    """ Fill the links of the articles referencing other articles in their
+    body, see ``knowledge.article._update_article_links``. """
+    env = api.Environment(cr, SUPERUSER_ID, {})
+    cr.execute("""
+        SELECT id
+          FROM knowledge_article
+         WHERE body LIKE '%o\\_knowledge\\_article\\_link%' OR body LIKE '%data-embedded%'
+    """)
+    article_ids = [article_id for article_id, in cr.fetchall()]
+    for batch_ids in split_every(100, article_ids):
+        env['knowledge.article'].with_context(active_test=False).browse(batch_ids)._update_article_links(is_new=True)
+        env.invalidate_all()
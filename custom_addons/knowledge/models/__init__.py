@@ -3,6 +3,7 @@
 
 from . import knowledge_article_thread
 from . import knowledge_article_favorite
+from . import knowledge_article_link
 from . import knowledge_article_member
 from . import knowledge_article_template_category
 from . import knowledge_article
@@ -11,3 +12,5 @@ from . import knowledge_cover
 from . import res_partner
 from . import res_users
 from . import ir_attachment
+from . import ir_websocket
+from . import mail_message
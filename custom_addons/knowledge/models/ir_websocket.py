@@ -0,0 +1,32 @@
+# -*- coding: utf-8 -*-
+# Part of Odoo. See LICENSE file for full copyright and licensing details.
+
+from odoo import models
+
+
+class IrWebsocket(models.AbstractModel):
+    _inherit = 'ir.websocket'
+
+    def _build_bus_channel_list(self, channels):
+        """ Let the sidebar listen to the changes of the articles under the
+        root articles it shows (see ``_notify_sidebar_changes`` on
+        ``knowledge.article``), as long as the user can read these roots.
+        The internal users also listen to the changes of the desynchronized
+        articles under these roots. """
+        channels = list(channels)  # do not alter original list
+        root_article_ids = set()
+        for channel in list(channels):
+            if isinstance(channel, str) and channel.startswith('knowledge_article_sidebar_'):
+                channels.remove(channel)
+                root_article_id = channel.removeprefix('knowledge_article_sidebar_')
+                if root_article_id.isdigit():
+                    root_article_ids.add(int(root_article_id))
+        if root_article_ids and self.env.uid:
+            root_articles = self.env['knowledge.article'].search([
+                ('id', 'in', list(root_article_ids)),
+                ('parent_id', '=', False),
+            ])
+            channels.extend((root_article, 'sidebar') for root_article in root_articles)
+            if not self.env.user.share:
+                channels.extend((root_article, 'sidebar_internal') for root_article in root_articles)
+        return super()._build_bus_channel_list(channels)
@@ -2,25 +2,134 @@
 # Part of Odoo. See LICENSE file for full copyright and licensing details.
 
 import ast
+import base64
+import binascii
+import hashlib
 import json
+import logging
+import os
+import psycopg2
 import re
+import threading
+import zipfile
+import zlib
 
-from collections import defaultdict
+from collections import Counter, defaultdict
+from contextlib import closing
 from datetime import datetime, timedelta
 from lxml import html
 from markupsafe import Markup
+from urllib.parse import quote
 from werkzeug.urls import url_join
 
 from odoo import api, Command, fields, models, _
+from odoo.addons.web_editor.models.diff_utils import apply_patch, generate_patch
 from odoo.addons.web_editor.tools import handle_history_divergence
 from odoo.exceptions import AccessError, ValidationError, UserError
 from odoo.osv import expression
-from odoo.tools import get_lang, is_html_empty, OrderedSet
+from odoo.tools import get_lang, is_html_empty, ormcache, split_every, OrderedSet
+from odoo.tools.lru import LRU
 from odoo.tools.translate import html_translate
 from odoo.tools.sql import create_index, make_index_name, SQL
 
+_logger = logging.getLogger(__name__)
+
 ARTICLE_PERMISSION_LEVEL = {'none': 0, 'read': 1, 'write': 2}
 
+# Stemmed PostgreSQL text search configurations, by language ISO code. They can
+# be enabled on top of 'knowledge_config' through 'knowledge.fts_language_configs'.
+FTS_LANGUAGE_CONFIGS = {
+    'da': 'danish', 'de': 'german', 'el': 'greek', 'en': 'english',
+    'es': 'spanish', 'fi': 'finnish', 'fr': 'french', 'hu': 'hungarian',
+    'it': 'italian', 'lt': 'lithuanian', 'nb': 'norwegian', 'nl': 'dutch',
+    'pt': 'portuguese', 'ro': 'romanian', 'ru': 'russian', 'sv': 'swedish',
+    'tr': 'turkish',
+}
+
+# Index method used for the values of the item properties, by property type.
+# Scalar values are filtered, sorted and grouped with a B-tree index on the
+# extracted JSONB value, lists (tags, many2many) are looked into with GIN.
+ARTICLE_PROPERTIES_INDEX_METHODS = {
+    'boolean': 'btree', 'char': 'btree', 'date': 'btree', 'datetime': 'btree',
+    'float': 'btree', 'integer': 'btree', 'many2one': 'btree', 'selection': 'btree',
+    'many2many': 'GIN', 'tags': 'GIN',
+}
+
+# The values of the item properties are only indexed for the parent articles
+# having enough items, up to a maximum number of indexes, as every index is
+# checked on each write of an article (see ``_get_properties_index_changes``).
+ARTICLE_PROPERTIES_INDEX_MIN_ITEMS = 1000
+ARTICLE_PROPERTIES_INDEX_LIMIT = 200
+
+# Loading of huge bodies by blocks (see ``get_body_blocks``): default number of
+# top-level blocks returned at once and number of characters read at once from
+# the database, doubled until enough blocks are read.
+BODY_BLOCKS_LIMIT = 50
+BODY_CHUNK_SIZE = 65536
+BODY_TAG_RE = re.compile(r"""<!--.*?-->|<(/)?([a-zA-Z][\w:-]*)(?:\s(?:[^>"']|"[^"]*"|'[^']*')*?)?\s*(/)?>""", re.S)
+
+# Default number of records of the first page of the embedded views, by view
+# type (see ``get_embedded_views_data``), as loaded by the embedded views.
+EMBEDDED_VIEW_LIMITS = {'kanban': 20, 'list': 40}
+
+# Number of values of the sidebar change sequence before the change token that
+# are checked again by the incremental synchronization of the sidebar (see
+# ``get_sidebar_articles``): a transaction may commit its changes after another
+# one that took a greater value of the sequence.
+SIDEBAR_CHANGE_TOKEN_WINDOW = 100
+
+# Sanitized bodies, by database, sanitize options of the field and content hash
+# of the body given to sanitize (see ``BodyHtml``): number of cached bodies,
+# maximum size of the cached bodies, and hits and misses of the cache.
+BODY_SANITIZE_CACHE_SIZE = 256
+BODY_SANITIZE_CACHE_BODY_SIZE = 262144
+BODY_SANITIZE_CACHE = LRU(BODY_SANITIZE_CACHE_SIZE)
+BODY_SANITIZE_CACHE_STATS = Counter()
+BODY_SANITIZE_CACHE_STATS_LOCK = threading.Lock()
+BODY_SANITIZE_OPTIONS = (
+    'sanitize', 'sanitize_tags', 'sanitize_attributes', 'sanitize_style', 'sanitize_form',
+    'sanitize_conditional_comments', 'sanitize_output_method', 'strip_style', 'strip_classes',
+)
+
+# Export of the articles of a subtree into a zip archive (see ``_export_subtree``):
+# number of articles exported per archive (the next ones being exported in the
+# next archives), number of articles read at once, and format of the bodies.
+EXPORT_ARTICLES_LIMIT = 1000
+EXPORT_BATCH_SIZE = 50
+EXPORT_FORMATS = {'html': '.html', 'markdown': '.md'}
+EXPORT_ATTACHMENT_URL_RE = re.compile(r"""/web/(?:image|content)/(\d+)[^"'()\s]*""")
+
+# Base64 images inlined in the bodies (pasted screenshots), moved into
+# attachments (see ``_extract_inline_images``). SVG images are left as is, as
+# they cannot be served as images to everyone from attachments.
+INLINE_IMAGE_RE = re.compile(r"""(?<=\ssrc=["'])data:image/(png|jpe?g|gif|webp|bmp);base64,([A-Za-z0-9+/=\s]+)(?=["'])""")
+
+
+class BodyHtml(fields.Html):
+    """ Html field caching its sanitized values by content hash: the body is
+    converted when it is put in cache and again when it is flushed to the
+    database, and autosaves often save the same body again. The bodies are
+    sanitized as a whole, as by ``fields.Html``, but only once. """
+
+    def _convert(self, value, record, validate):
+        if not validate or not self.sanitize or self.sanitize_overridable or not value \
+           or len(value) > BODY_SANITIZE_CACHE_BODY_SIZE:
+            return super()._convert(value, record, validate)
+        key = (
+            record.env.cr.dbname, self.model_name, self.name,
+            tuple(getattr(self, option, None) for option in BODY_SANITIZE_OPTIONS),
+            hashlib.sha1(str(value).encode()).digest(),
+        )
+        sanitized_value = BODY_SANITIZE_CACHE.get(key)
+        with BODY_SANITIZE_CACHE_STATS_LOCK:
+            BODY_SANITIZE_CACHE_STATS['misses' if sanitized_value is None else 'hits'] += 1
+        if sanitized_value is None:
+            sanitized_value = BODY_SANITIZE_CACHE[key] = super()._convert(value, record, validate)
+            if sanitized_value:
+                # the value flushed to the database is the sanitized one
+                BODY_SANITIZE_CACHE[key[:-1] + (hashlib.sha1(sanitized_value.encode()).digest(),)] = sanitized_value
+        return sanitized_value
+
 
 class Article(models.Model):
     _name = "knowledge.article"
@@ -34,10 +143,25 @@ class Article(models.Model):
         return [Article.body.name]
 
     DEFAULT_ARTICLE_TRASH_LIMIT_DAYS = 30
+    DEFAULT_ARTICLE_HISTORY_LIMIT = 100
+    # Compressed patches of the history of the body (see ``_compact_body_history``)
+    HISTORY_COMPRESSED_PATCH_PREFIX = 'zlib:'
+
+    @property
+    def _html_field_history_size_limit(self):
+        """ Maximum number of revisions kept in the history of the body of each
+        article, see 'knowledge.knowledge_article_history_limit'. """
+        return self._get_body_history_limit()
 
     active = fields.Boolean(default=True)
     name = fields.Char(string="Title", tracking=20, default_export_compatible=True, index="trigram")
-    body = fields.Html(string="Body", prefetch=False)
+    body = BodyHtml(string="Body", prefetch=False)
+    body_size = fields.Integer(
+        string="Body Size", compute="_compute_body_size", store=True,
+        help="Size of the body in bytes, used to load huge bodies by blocks.")
+    body_checksum = fields.Char(
+        string="Body Checksum", compute="_compute_body_checksum",
+        help="Checksum of the body, on which the changes saved with 'write_body_changes' are based.")
     icon = fields.Char(string='Emoji')
     cover_image_id = fields.Many2one("knowledge.cover", string='Article cover')
     cover_image_url = fields.Char(related="cover_image_id.attachment_url", string="Cover url")
@@ -105,6 +229,13 @@ class Article(models.Model):
         string="Sequence",
         default=0,  # Set default=0 to avoid false values and messed up sequence order inside same parent
         help="The sequence is computed only among the articles that have the same parent.")
+    sidebar_change_sequence = fields.Integer(
+        string="Sidebar Change Sequence", readonly=True, copy=False, index='btree_not_null',
+        help="Incremented when the article changes in the sidebar, see 'get_sidebar_articles'.")
+    sidebar_tree_change_sequence = fields.Integer(
+        string="Sidebar Tree Change Sequence", readonly=True, copy=False, index='btree_not_null',
+        help="Incremented when the article changes in the sidebar with its descendants, "
+             "see 'get_sidebar_articles'.")
     root_article_id = fields.Many2one(
         'knowledge.article', string="Menu Article", recursive=True,
         compute="_compute_root_article_id", store=True, compute_sudo=True, tracking=10,
@@ -135,10 +266,11 @@ class Article(models.Model):
     favorite_ids = fields.One2many(
         'knowledge.article.favorite', 'article_id',
         string='Favorite Articles', copy=False)
-    # Set default=0 to avoid false values and messed up order
+    # Set default=0 to avoid false values and messed up order. Maintained by
+    # atomic increments when favorites are added or removed, see
+    # ``knowledge.article.favorite._update_article_favorite_count``
     favorite_count = fields.Integer(
-        string="#Is Favorite",
-        compute="_compute_favorite_count", store=True, copy=False, default=0)
+        string="#Is Favorite", copy=False, default=0, readonly=True)
     # Visibility
     is_article_visible_by_everyone = fields.Boolean(
         string="Can everyone see the Article?", compute="_compute_is_article_visible_by_everyone",
@@ -269,6 +401,204 @@ class Article(models.Model):
                 ["to_tsvector('knowledge_config', body)"],
                 method='GIN')
 
+        # Indexes used by the extended search (see ``get_user_sorted_articles_extended``)
+        # to look into the comments of the articles and into the properties of the
+        # items. The messages of the comments are indexed by ``mail.message``.
+        create_index(
+            self.env.cr,
+            make_index_name('knowledge_article_thread', 'article_anchor_text'),
+            'knowledge_article_thread',
+            ["to_tsvector('knowledge_config', article_anchor_text)"],
+            method='GIN')
+        create_index(
+            self.env.cr,
+            make_index_name(self._table, 'article_properties_tsvector'),
+            self._table,
+            ["jsonb_to_tsvector('knowledge_config', article_properties, '[\"string\"]')"],
+            method='GIN',
+            where='is_article_item IS TRUE')
+
+        # Index used to rank the articles by similarity of their name with the
+        # searched text (see ``_search_ranked_by_name``). The GIN trigram index
+        # of the name field speeds up the 'ILIKE' filter, but cannot return
+        # the rows ordered by distance.
+        if self.pool.has_trigram:
+            create_index(
+                self.env.cr,
+                make_index_name(self._table, 'name_trigram_gist'),
+                self._table,
+                ['name gist_trgm_ops'],
+                method='GIST')
+
+        # Index covering the default order of the articles, so that the most
+        # favorited articles can be listed without sorting the whole table.
+        create_index(
+            self.env.cr,
+            make_index_name(self._table, 'default_order'),
+            self._table,
+            ['favorite_count DESC', 'write_date DESC', 'id DESC'])
+
+        self._init_fts_language_indexes()
+
+        self.env.cr.execute("CREATE SEQUENCE IF NOT EXISTS knowledge_article_sidebar_change_seq")
+
+    def _init_fts_language_indexes(self):
+        """ Create a GIN index for each stemmed text search configuration
+        enabled through the 'knowledge.fts_language_configs' parameter. The
+        'knowledge_config' index above never applies stemming, so that "invoices"
+        does not match "invoice": these additional indexes allow to search
+        the articles with the inflected forms of the words of a language,
+        without falling back on an 'ILIKE' scan of the bodies. """
+        for config in self._get_fts_language_configs(indexed_only=False):
+            create_index(
+                self.env.cr,
+                make_index_name(self._table, f'body_{config}'),
+                self._table,
+                [f"to_tsvector('{config}', body)"],
+                method='GIN')
+
+    @api.model
+    def _cron_update_indexes(self, concurrently=True):
+        """ Create and drop the indexes whose need depends on the data of the
+        articles (see ``_get_properties_index_changes``). The indexes are built
+        and dropped CONCURRENTLY, outside of any transaction, so that the
+        articles can still be read and written meanwhile; a build that failed
+        leaves an invalid index, which is dropped and built again next time.
+
+        :param bool concurrently: False to update the indexes within the current
+          transaction instead (e.g. in tests), locking the table meanwhile;
+        """
+        to_create, to_drop = self._get_properties_index_changes()
+        fts_to_create, fts_to_drop = self._get_fts_index_changes()
+        to_create.update(fts_to_create)
+        to_drop |= fts_to_drop
+        if not to_create and not to_drop:
+            return
+        queries = [
+            SQL("DROP INDEX %s IF EXISTS %s", SQL("CONCURRENTLY") if concurrently else SQL(), SQL.identifier(index_name))
+            for index_name in sorted(to_drop)
+        ] + [
+            SQL("CREATE INDEX %s IF NOT EXISTS %s ON %s USING %s (%s) %s",
+                SQL("CONCURRENTLY") if concurrently else SQL(), SQL.identifier(index_name),
+                SQL.identifier(self._table), SQL(method), SQL(expression),
+                SQL("WHERE %s", SQL(where)) if where else SQL())
+            for index_name, (expression, method, where) in sorted(to_create.items())
+        ]
+        if not concurrently:
+            for query in queries:
+                self.env.cr.execute(query)
+            self.env.registry.clear_cache()
+            return
+
+        # indexes are built concurrently once the transactions using the table
+        # are done, including the current one
+        self.env.cr.commit()
+        with closing(self.env.registry.cursor()) as cr:
+            cr._cnx.autocommit = True
+            for query in queries:
+                try:
+                    cr.execute(query)
+                except psycopg2.Error:
+                    _logger.warning("Failed to update the index of the articles: %s", query.code, exc_info=True)
+        # the text search configurations are only used once their index is built
+        self.env.registry.clear_cache()
+
+    @api.model
+    def _get_fts_index_changes(self):
+        """ Return the indexes of the bodies for the stemmed text search
+        configurations (see ``_get_fts_language_configs``) to create and to
+        drop, as ``_get_properties_index_changes``: the configurations enabled
+        at runtime are only used by the search once their index is built. """
+        indexes = {
+            make_index_name(self._table, f'body_{config}'): (f"to_tsvector('{config}', body)", 'GIN', False)
+            for config in self._get_fts_language_configs(indexed_only=False)
+        }
+        self.env.cr.execute(SQL(
+            """
+            SELECT index.relname, pg_index.indisvalid
+              FROM pg_index
+              JOIN pg_class index ON index.oid = pg_index.indexrelid
+             WHERE index.relname IN %s
+            """,
+            tuple(make_index_name(self._table, f'body_{config}') for config in FTS_LANGUAGE_CONFIGS.values()),
+        ))
+        existing = dict(self.env.cr.fetchall())
+        to_create = {
+            index_name: index for index_name, index in indexes.items()
+            if not existing.get(index_name)
+        }
+        to_drop = {
+            index_name for index_name, is_valid in existing.items()
+            if not is_valid or index_name not in indexes
+        }
+        return to_create, to_drop
+
+    @api.model
+    def _get_properties_index_changes(self):
+        """ Return the indexes of the values of the item properties to create
+        and to drop. One expression index is kept for each property of the item
+        definitions, restricted to the items of the parent article. Embedded
+        views of items always filter on their parent, so that PostgreSQL can
+        use these indexes to filter, sort and group the items on the values of
+        their properties, instead of reading the JSONB of every item.
+
+        As each partial index is checked on every write of an article, only the
+        parent articles having at least ``ARTICLE_PROPERTIES_INDEX_MIN_ITEMS``
+        items are indexed, the biggest ones first, up to
+        ``ARTICLE_PROPERTIES_INDEX_LIMIT`` indexes.
+
+        :return tuple: the indexes to create, as a dict giving the expression,
+          the method and the condition of each index by name, and the set of
+          the names of the indexes to drop;
+        """
+        self.flush_model(['article_properties_definition', 'is_article_item', 'parent_id'])
+        self.env.cr.execute(SQL(
+            """
+            SELECT parent.id, parent.article_properties_definition
+              FROM knowledge_article parent
+              JOIN knowledge_article item ON item.parent_id = parent.id AND item.is_article_item IS TRUE
+             WHERE parent.article_properties_definition IS NOT NULL
+          GROUP BY parent.id
+            HAVING COUNT(*) >= %s
+          ORDER BY COUNT(*) DESC, parent.id
+            """,
+            ARTICLE_PROPERTIES_INDEX_MIN_ITEMS,
+        ))
+        indexes = {}
+        for parent_id, definition in self.env.cr.fetchall():
+            for property_definition in definition or []:
+                property_name = property_definition.get('name') or ''
+                property_type = property_definition.get('type')
+                method = ARTICLE_PROPERTIES_INDEX_METHODS.get(property_type)
+                # the name is written as is in the index expression
+                if not method or not re.fullmatch(r'[a-zA-Z0-9_]+', property_name):
+                    continue
+                if len(indexes) >= ARTICLE_PROPERTIES_INDEX_LIMIT:
+                    break
+                index_name = make_index_name(self._table, f'properties_{parent_id}_{property_name}_{property_type}')
+                indexes[index_name] = (f"(article_properties -> '{property_name}')", method, f'parent_id = {parent_id}')
+
+        self.env.cr.execute(SQL(
+            """
+            SELECT index.relname, pg_index.indisvalid
+              FROM pg_index
+              JOIN pg_class index ON index.oid = pg_index.indexrelid
+              JOIN pg_class tbl ON tbl.oid = pg_index.indrelid
+             WHERE tbl.relname = %s AND index.relname LIKE %s
+            """,
+            self._table, f'{self._table}__properties_'.replace('_', r'\_') + '%',
+        ))
+        existing = dict(self.env.cr.fetchall())
+        to_create = {
+            index_name: index for index_name, index in indexes.items()
+            if not existing.get(index_name)
+        }
+        to_drop = {
+            index_name for index_name, is_valid in existing.items()
+            if not is_valid or index_name not in indexes
+        }
+        return to_create, to_drop
+
     # ------------------------------------------------------------
     # CONSTRAINTS
     # ------------------------------------------------------------
@@ -322,6 +652,16 @@ class Article(models.Model):
     # COMPUTED FIELDS
     # ------------------------------------------------------------
 
+    @api.depends('body')
+    def _compute_body_size(self):
+        for article in self:
+            article.body_size = len(article.body.encode()) if article.body else 0
+
+    @api.depends('body')
+    def _compute_body_checksum(self):
+        for article in self:
+            article.body_checksum = hashlib.sha1((article.body or '').encode()).hexdigest()
+
     def _compute_article_url(self):
         for article in self:
             if not article.ids:
@@ -626,15 +966,6 @@ class Article(models.Model):
             else:
                 article.category = 'private'
 
-    @api.depends('favorite_ids')
-    def _compute_favorite_count(self):
-        favorites = self.env['knowledge.article.favorite']._read_group(
-            [('article_id', 'in', self.ids)], ['article_id'], ['__count']
-        )
-        favorites_count_by_article = {article.id: count for article, count in favorites}
-        for article in self:
-            article.favorite_count = favorites_count_by_article.get(article.id, 0)
-
     @api.depends_context('uid')
     @api.depends('favorite_ids.user_id')
     def _compute_is_user_favorite(self):
@@ -762,69 +1093,23 @@ class Article(models.Model):
     # CRUD
     # ------------------------------------------------------------
 
-    @api.model
-    def search_fetch(self, domain, field_names, offset=0, limit=None, order=None):
+    def _order_field_to_sql(self, alias, field_name, direction, nulls, query):
         """ Override to support ordering on is_user_favorite.
 
-        Ordering through web client calls search_read with an order parameter set.
-        Search_read then calls search. In this override we therefore override search
-        to intercept a search without count with an order on is_user_favorite.
-        In that case we do the search in two steps.
-
-        First step: fill with current user's favorite results
-
-          * Search articles that are favorite of the current user.
-          * Results of that search will be at the top of returned results. Use limit
-            None because we have to search all favorite articles.
-          * Finally take only a subset of those articles to fill with
-            results matching asked offset / limit.
-
-        Second step: fill with other results. If first step does not gives results
-        enough to match offset and limit parameters we fill with a search on other
-        articles. We keep the asked domain and ordering while filtering out already
-        scanned articles to keep a coherent results.
-
-        All other search and search_read are left untouched by this override to avoid
-        side effects. Search_count is not affected by this override.
-        """
-        if not order or 'is_user_favorite' not in order:
-            return super().search_fetch(domain, field_names, offset, limit, order)
-        order_items = [order_item.strip().lower() for order_item in (order or self._order).split(',')]
-        favorite_asc = any('is_user_favorite asc' in item for item in order_items)
-
-        # Search articles that are favorite of the current user.
-        my_articles_domain = expression.AND([[('favorite_ids.user_id', 'in', [self.env.uid])], domain])
-        my_articles_order = ', '.join(item for item in order_items if 'is_user_favorite' not in item)
-        articles_ids = super().search_fetch(my_articles_domain, field_names, order=my_articles_order).ids
-
-        # keep only requested window (offset + limit, or offset+)
-        my_articles_ids_keep = articles_ids[offset:(offset + limit)] if limit else articles_ids[offset:]
-        # keep list of already skipped article ids to exclude them from future search
-        my_articles_ids_skip = articles_ids[:(offset + limit)] if limit else articles_ids
-
-        # do not go further if limit is achieved
-        if limit and len(my_articles_ids_keep) >= limit:
-            return self.browse(my_articles_ids_keep)
-
-        # Fill with remaining articles. If a limit is given, simply remove count of
-        # already fetched. Otherwise keep none. If an offset is set we have to
-        # reduce it by already fetch results hereabove. Order is updated to exclude
-        # is_user_favorite when calling super() .
-        article_limit = (limit - len(my_articles_ids_keep)) if limit else None
-        if offset:
-            article_offset = max((offset - len(articles_ids), 0))
-        else:
-            article_offset = 0
-        article_order = ', '.join(item for item in order_items if 'is_user_favorite' not in item)
-
-        other_article_res = super().search_fetch(
-            expression.AND([[('id', 'not in', my_articles_ids_skip)], domain]),
-            field_names, article_offset, article_limit, article_order,
-        )
-        if favorite_asc in order_items:
-            return other_article_res + self.browse(my_articles_ids_keep)
-        else:
-            return self.browse(my_articles_ids_keep) + other_article_res
+        Ordering through web client calls search_read with an order on
+        is_user_favorite, which is not stored as it depends on the current
+        user. The favorite of the current user is joined to the articles and
+        the order is done on the presence of that favorite, so that the whole
+        search remains a single query with the usual offset and limit. """
+        if field_name != 'is_user_favorite':
+            return super()._order_field_to_sql(alias, field_name, direction, nulls, query)
+        favorite_alias = query.make_alias(alias, 'user_favorite')
+        query.add_join('LEFT JOIN', favorite_alias, 'knowledge_article_favorite', SQL(
+            "%s = %s AND %s = %s",
+            SQL.identifier(favorite_alias, 'article_id'), SQL.identifier(alias, 'id'),
+            SQL.identifier(favorite_alias, 'user_id'), self.env.uid,
+        ))
+        return SQL("%s IS NOT NULL %s", SQL.identifier(favorite_alias, 'id'), direction)
 
     @api.model_create_multi
     def create(self, vals_list):
@@ -940,6 +1225,12 @@ class Article(models.Model):
                     vals['sequence'] = current_sequence
                     current_sequence += 1
 
+        # move the inline images into attachments, linked to the articles once created
+        inline_images_by_vals_index = {}
+        for index, vals in enumerate(vals_list):
+            if vals.get('body'):
+                vals['body'], inline_images_by_vals_index[index] = self.browse()._extract_inline_images(vals['body'])
+
         # sort by sudo / not sudo
         notsudo_articles = iter(super(Article, self).create([
             vals for vals, can_sudo in zip(vals_list, vals_as_sudo)
@@ -959,6 +1250,19 @@ class Article(models.Model):
         if any(articles.mapped('is_template')) and not self.env.user.has_group('base.group_system'):
             raise ValidationError(_('You are not allowed to create a new template.'))
 
+        for index, inline_images in inline_images_by_vals_index.items():
+            if inline_images:
+                inline_images.write({'res_id': articles[index].id})
+
+        # parents may get their first child
+        articles.parent_id._bump_sidebar_change_sequence()
+        articles._notify_sidebar_changes(moved=True)
+
+        if articles.filtered('article_properties_definition'):
+            self.env.ref('knowledge.ir_cron_update_indexes')._trigger()
+
+        articles._update_article_links(is_new=True)
+
         return articles
 
     def write(self, vals):
@@ -969,6 +1273,12 @@ class Article(models.Model):
             for article in self) and not self.env.user.has_group('base.group_system'):
             raise ValidationError(_('You are not allowed to update the type of a article or a template.'))
 
+        if len(self) > 1 and 'data:image/' in (vals.get('body') or ''):
+            # each article gets its own attachments of the inline images
+            for article in self:
+                article.write(dict(vals))
+            return True
+
         # Move under a parent is considered as a write on it (permissions, ...)
         _resequence = False
         if not self.env.user._is_internal() and not self.env.su:
@@ -984,6 +1294,7 @@ class Article(models.Model):
         if 'body' in vals:
             if len(self) == 1:
                 handle_history_divergence(self, 'body', vals)
+            vals['body'] = self._extract_inline_images(vals['body'])[0] if len(self) == 1 else vals['body']
             vals.update({
                 'last_edition_date': fields.Datetime.now(),
                 'last_edition_uid': self.env.user.id,
@@ -992,6 +1303,10 @@ class Article(models.Model):
             vals.pop('last_edition_date', False)
             vals.pop('last_edition_uid', False)
 
+        # parents may lose their last child
+        sidebar_parents = self.parent_id if vals.keys() & {'active', 'is_article_item', 'parent_id', 'to_delete'} \
+            else self.env['knowledge.article']
+
         if 'parent_id' in vals:
             parent = self.env['knowledge.article']
             if vals.get('parent_id') and self.filtered(lambda r: r.parent_id.id != vals['parent_id']):
@@ -1012,6 +1327,31 @@ class Article(models.Model):
         if _resequence:
             self.sudo()._resequence()
 
+        if vals.keys() & self._get_sidebar_fields():
+            # the category and the permissions are inherited by the descendants
+            self._bump_sidebar_change_sequence(with_descendants=bool(vals.keys() & {
+                'article_member_ids', 'internal_permission', 'is_article_visible_by_everyone',
+                'is_desynchronized', 'parent_id',
+            }))
+            (sidebar_parents | self.parent_id)._bump_sidebar_change_sequence()
+        if vals.keys() & {'active', 'icon', 'internal_permission', 'name', 'parent_id', 'sequence'}:
+            self._notify_sidebar_changes(moved=bool(vals.keys() & {'parent_id', 'sequence'}))
+
+        if 'article_properties_definition' in vals:
+            self.env.ref('knowledge.ir_cron_update_indexes')._trigger()
+
+        if 'body' in vals:
+            self._update_article_links()
+
+        return result
+
+    def unlink(self):
+        has_definitions = bool(self.filtered('article_properties_definition'))
+        (self.parent_id - self)._bump_sidebar_change_sequence()
+        self._notify_sidebar_changes(deleted=True)
+        result = super().unlink()
+        if has_definitions:
+            self.env.ref('knowledge.ir_cron_update_indexes')._trigger()
         return result
 
     @api.ondelete(at_uninstall=False)
@@ -1087,6 +1427,20 @@ class Article(models.Model):
         domain = [("write_date", "<", timeout_ago), ("to_delete", "=", True)]
         return self.with_context(active_test=False).search(domain, limit=100).unlink()
 
+    @api.autovacuum
+    def _gc_body_history(self):
+        """ Compact the history of the bodies edited during the last month. The
+        history of the other articles has already been compacted once their
+        revisions were older than a month. """
+        self.env.cr.execute(SQL(
+            "SELECT id FROM knowledge_article WHERE write_date >= %s AND html_field_history IS NOT NULL",
+            datetime.utcnow() - timedelta(days=31),
+        ))
+        article_ids = [article_id for article_id, in self.env.cr.fetchall()]
+        for batch_ids in split_every(100, article_ids):
+            self.with_context(active_test=False).browse(batch_ids)._compact_body_history()
+            self.env.invalidate_all()
+
     def action_archive(self):
         self._action_archive_articles()
 
@@ -1163,6 +1517,47 @@ class Article(models.Model):
 
         return domain
 
+    @api.model
+    def name_search(self, name='', domain=None, operator='ilike', limit=100):
+        """ Rank the matching articles by similarity of their name with the
+        searched text (see ``_search_ranked_by_name``), so that pickers show
+        the closest articles first rather than the most popular ones. """
+        if not name or operator != 'ilike' or not self.pool.has_trigram:
+            return super().name_search(name=name, domain=domain, operator=operator, limit=limit)
+
+        domain = expression.AND([[('display_name', operator, name)], domain or []])
+        articles = self.browse(self._search_ranked_by_name(domain, name, limit=limit))
+        return [(article.id, article.display_name) for article in articles.sudo()]
+
+    @api.model
+    def _search_ranked_by_name(self, domain, search_term, limit=None):
+        """ Search the articles matching the given domain, ordered by trigram
+        similarity of their name with the given search term, then by the
+        default order of the articles.
+
+        The similarity distance operator ('<->') is supported by the
+        GiST trigram index on the name (see ``init``): PostgreSQL can read the
+        closest articles straight from the index and stop at the limit, instead
+        of sorting all the articles whose name contains the search term.
+
+        :param list domain: domain of the articles to search;
+        :param str search_term: text typed by the user, with or without icon;
+        :param int limit: maximum number of articles to return;
+
+        :return: the query of the matching articles
+        :rtype: Query
+        """
+        query = self._search(domain, limit=limit)
+        article_name = self._extract_icon_from_name(search_term)[0] if search_term else ''
+        if article_name and self.pool.has_trigram:
+            query.order = SQL(
+                "%s <-> %s, %s",
+                self._field_to_sql(query.table, 'name', query),
+                article_name,
+                self._order_to_sql(self._order, query),
+            )
+        return query
+
     def _get_common_copied_data(self):
         return {
             "article_properties_definition": self.article_properties_definition,
@@ -1183,6 +1578,15 @@ class Article(models.Model):
         of the original article will now list the article items of the current record.
         :param <knowledge.article> original_article: original article
         """
+        # the links of the original article tell whether its body embeds views
+        # of its own article items, avoiding to parse the bodies otherwise
+        has_self_embedded_views = self.env['knowledge.article.link'].sudo().search_count([
+            ('source_article_id', '=', original_article.id),
+            ('target_res_id', '=', original_article.id),
+            ('kind', '=', 'embedded_view'),
+        ], limit=1)
+        if not has_self_embedded_views:
+            return
         for article in self:
             if is_html_empty(article.body):
                 continue
@@ -1205,6 +1609,68 @@ class Article(models.Model):
                     "body": html.tostring(fragment, encoding="unicode")
                 })
 
+    @api.model
+    def _get_body_references(self, body):
+        """ Return the references to other articles made in the given body, as
+        a set of (article id, kind) (see ``knowledge.article.link``). """
+        if not body or ('o_knowledge_article_link' not in body and 'data-embedded' not in body):
+            return set()
+        references = set()
+        fragment = html.fragment_fromstring(body, create_parent=True)
+        for element in fragment.xpath('//*[contains(@class, "o_knowledge_article_link")]'):
+            article_id = element.get('data-res_id') or ''
+            if article_id.isdigit():
+                references.add((int(article_id), 'link'))
+        for element in fragment.xpath('//*[@data-embedded="view"]'):
+            try:
+                embedded_props = json.loads(element.get('data-embedded-props') or '{}')
+            except ValueError:
+                continue
+            article_id = embedded_props.get('viewProps', {}).get('context', {}).get('active_id')
+            if isinstance(article_id, int):
+                references.add((article_id, 'embedded_view'))
+        return references
+
+    def _update_article_links(self, is_new=False):
+        """ Synchronize the links of the articles with the references made in
+        their body (see ``knowledge.article.link``).
+
+        :param bool is_new: whether the articles are being created, in which
+          case they do not have any link yet;
+        """
+        references = {
+            (article.id, article_id, kind)
+            for article in self
+            for article_id, kind in self._get_body_references(article.body)
+        }
+        ArticleLink = self.env['knowledge.article.link'].sudo()
+        if is_new:
+            link_by_reference = {}
+        else:
+            link_by_reference = {
+                (link.source_article_id.id, link.target_res_id, link.kind): link
+                for link in ArticleLink.search([('source_article_id', 'in', self.ids)])
+            }
+        if links_to_remove := [link.id for reference, link in link_by_reference.items() if reference not in references]:
+            ArticleLink.browse(links_to_remove).unlink()
+        if references_to_add := references - link_by_reference.keys():
+            existing_article_ids = set(self.sudo().browse(
+                {article_id for _source_id, article_id, _kind in references_to_add}).exists().ids)
+            ArticleLink.create([{
+                'source_article_id': source_id,
+                'target_article_id': article_id if article_id in existing_article_ids else False,
+                'target_res_id': article_id,
+                'kind': kind,
+            } for source_id, article_id, kind in references_to_add])
+
+    def get_backlinks(self):
+        """ Return the articles referencing the article in their body, among the
+        articles the current user can access. """
+        self.ensure_one()
+        links = self.env['knowledge.article.link'].sudo().search([('target_article_id', '=', self.id)])
+        articles = self.search([('id', 'in', links.source_article_id.ids)], order='name, id')
+        return articles.read(['name', 'icon', 'display_name'])
+
     # ------------------------------------------------------------
     # ACTIONS
     # ------------------------------------------------------------
@@ -1229,10 +1695,9 @@ class Article(models.Model):
         article = self.create(article_vals)
         article._update_article_references(self)
         # Copy the related stages for the /kanban command:
-        for stage in self.env["knowledge.article.stage"].search([("parent_id", "=", self.id)]):
-            stage.copy({
-                "parent_id": article.id
-            })
+        self.env["knowledge.article.stage"].search([("parent_id", "=", self.id)]).copy({
+            "parent_id": article.id
+        })
         return article
 
     @api.returns('self', lambda value: value.id)
@@ -1255,10 +1720,9 @@ class Article(models.Model):
         article = self.create(article_vals)
         article._update_article_references(self)
         # Copy the related stages for the /kanban command:
-        for stage in self.env["knowledge.article.stage"].search([("parent_id", "=", self.id)]):
-            stage.copy({
-                "parent_id": article.id
-            })
+        self.env["knowledge.article.stage"].search([("parent_id", "=", self.id)]).copy({
+            "parent_id": article.id
+        })
         return article
 
     def action_home_page(self):
@@ -1383,6 +1847,16 @@ class Article(models.Model):
             self.sudo()._add_members(current_user.partner_id, self.internal_permission)
             return False
 
+    def action_export_subtree(self, export_format='html'):
+        """ Download the article and all its descendants as a zip archive (see
+        ``_export_subtree``). """
+        self.ensure_one()
+        return {
+            'type': 'ir.actions.act_url',
+            'url': f'/knowledge/article/{self.id}/export?export_format={export_format}',
+            'target': 'download',
+        }
+
     # ------------------------------------------------------------
     # SEQUENCE / ORDERING
     # ------------------------------------------------------------
@@ -1558,7 +2032,7 @@ class Article(models.Model):
 
         return values
 
-    def get_user_sorted_articles(self, search_query, limit=40, hidden_mode=False):
+    def get_user_sorted_articles(self, search_query, limit=40, hidden_mode=False, with_facets=False, cursor=None):
         """ Called when using the Command palette to search for articles matching
             with the given search terms. If no search terms are provided, the
             function returns the user's favorite articles when hidden_mode is False;
@@ -1587,44 +2061,157 @@ class Article(models.Model):
               we pre-select relevant matches first, the query should return
               relevant results but not necessarily the most relevant ones.
 
+            The body is matched with the language agnostic 'knowledge_config'
+            text search configuration and with the stemmed configurations of
+            the user and company languages, when enabled through the
+            `knowledge.fts_language_configs` configuration (see
+            ``_get_fts_search_configs``).
+
+            When `with_facets` is set, the same query also counts the selected
+            candidates by category, by root article, by favorite status and by
+            type (items or articles) using grouping sets, allowing the user to
+            see how the results spread across the workspaces without sending
+            more queries. As only the candidates are counted, the counts are
+            incomplete when the number of candidates reaches the cut off, which
+            is told by 'facets_truncated'.
+
+            The ranked results can be paginated with a `cursor`: the key
+            (order, score, is_user_favorite, id) of the last article of the
+            previous page. When paginating, the candidates are not picked
+            arbitrarily up to the cut off anymore: each CTE ranks all its
+            matches and only keeps the first ones ranked after the cursor, so
+            that the pages never overlap nor skip articles, and that the
+            pagination goes through all the matches, past the cut off. The
+            facets are only counted with the first page.
+
         :param str search_query: Search terms of the user
         :param int limit: Maximal number of records to return
         :param bool hidden_mode: If True, scope the search to the hidden articles.
                                  If False, scope the search to the visible articles.
+        :param bool with_facets: If True, return a dict holding the matching
+                                 articles ('articles'), the facet counts
+                                 ('facets', see ``_prepare_search_facets``)
+                                 and whether these counts are capped by the
+                                 cut off ('facets_truncated').
+        :param list cursor: If set, return a dict holding the matching articles
+                            ('articles') ranked after the given cursor and the
+                            cursor of the next page ('next_cursor', False on the
+                            last page). Use an empty list to get the first page.
         """
-        domain = [
-            ('is_template', '=', False),
-            ('is_article_visible', '!=', hidden_mode),
-            ('user_has_access', '=', True),  # Admins won't see other's private articles.
-        ]
+        domain = self._get_user_sorted_articles_domain(hidden_mode)
         if not search_query:
             if not hidden_mode:
                 domain = [('is_user_favorite', '=', True)]
-            return self.search(domain, limit=limit).read([
+            articles = self.search(domain, limit=limit).read([
                 'id',
                 'icon',
                 'name',
                 'is_user_favorite',
                 'root_article_id'
             ])
+            # favorites and hidden articles are not ranked: they are not paginated
+            return self._prepare_sorted_articles_page(
+                articles, with_facets=with_facets, with_cursor=cursor is not None
+            )
+        if cursor and len(cursor) != 4:
+            raise ValueError(_("Invalid search cursor: %s", cursor))
+
+        with_facets = with_facets and not cursor
+        self.env.cr.execute(self._get_user_sorted_articles_query(
+            search_query, domain, limit, with_facets=with_facets, cursor=cursor))
+
+        sorted_articles = self.env.cr.dictfetchall()
+        facet_counts = sorted_articles[0].get('facet_counts') if sorted_articles else []
+        facets_truncated = bool(sorted_articles and sorted_articles[0].get('facets_truncated'))
+        next_cursor = False
+        if len(sorted_articles) == limit:
+            last_article = sorted_articles[-1]
+            next_cursor = [last_article['search_order'], last_article['search_score'],
+                           last_article['is_user_favorite'], last_article['id']]
+        for sorted_article in sorted_articles:
+            sorted_article.pop('facet_counts', None)
+            sorted_article.pop('facets_truncated', None)
+            del sorted_article['search_order']
+            del sorted_article['search_score']
+        return self._prepare_sorted_articles_page(
+            self._prepare_sorted_articles_results(sorted_articles),
+            facet_counts=facet_counts or [],
+            facets_truncated=facets_truncated,
+            next_cursor=next_cursor,
+            with_facets=with_facets,
+            with_cursor=cursor is not None,
+        )
+
+    @api.model
+    def _get_user_sorted_articles_domain(self, hidden_mode=False):
+        """ Domain of the articles the command palette searches into. """
+        return [
+            ('is_template', '=', False),
+            ('is_article_visible', '!=', hidden_mode),
+            ('user_has_access', '=', True),  # Admins won't see other's private articles.
+        ]
 
+    def _get_user_sorted_articles_query(self, search_query, domain, limit, with_facets=False, cursor=None):
+        """ Build the SQL query used by ``get_user_sorted_articles`` to search
+        for the articles matching with the given search terms within the given
+        domain. See that method for the parameters and for details. """
         query = self._search(domain)
 
         # Escape special characters recognized by the 'ILIKE' keyword
         search_pattern = '%' + re.sub(r'(%|_|\\)', r'\\\1', search_query) + '%'
         ts_query = SQL("plainto_tsquery('knowledge_config', %(search_query)s)", search_query=search_query)
-        cut_off = max(self.env['ir.config_parameter'].sudo().get_param('knowledge.fts_search_cut_off', 100), limit)
-
-        self.env.cr.execute(SQL('''
+        cut_off = self._get_fts_search_cut_off(limit)
+        body_match, body_score, body_headline = self._get_fts_body_clauses(search_query)
+        title_match = SQL("knowledge_article.name ILIKE %s", search_pattern)
+        title_and_body_score = SQL(
+            "ts_rank_cd(to_tsvector('knowledge_config', knowledge_article.name), %s)", ts_query)
+
+        if cursor is None:
+            # the candidates matching with the title are excluded from the next
+            # CTEs; some of them may be left out by the cut off
+            title_exclusion = SQL(
+                "knowledge_article.id NOT IN (SELECT id FROM articles_matching_with_title_and_body)")
+            body_exclusion = SQL("""knowledge_article.id NOT IN (
+                SELECT id FROM articles_matching_with_title_and_body
+                UNION ALL
+                SELECT id FROM articles_matching_with_title)""")
+            title_and_body_ranking = title_ranking = body_ranking = SQL()
+        else:
+            # each CTE keeps its first matches ranked after the cursor
+            title_exclusion = SQL("(%s) IS NOT TRUE", body_match)
+            body_exclusion = SQL("(%s) IS NOT TRUE", title_match)
+            is_user_favorite = SQL(
+                "EXISTS(SELECT 1 FROM knowledge_article_favorite WHERE article_id = knowledge_article.id AND user_id = %s)",
+                self.env.uid)
+
+            def get_ranking(order, score):
+                if not cursor or order > cursor[0]:
+                    cursor_clause = SQL()
+                elif order < cursor[0]:
+                    cursor_clause = SQL("AND FALSE")
+                else:
+                    cursor_clause = SQL(
+                        "AND (-(%s), NOT %s, -knowledge_article.id) > (-CAST(%s AS REAL), NOT %s, -%s)",
+                        score, is_user_favorite, *cursor[1:])
+                return SQL(
+                    "%s ORDER BY %s DESC, %s DESC, knowledge_article.id DESC",
+                    cursor_clause, score, is_user_favorite)
+
+            title_and_body_ranking = get_ranking(1, title_and_body_score)
+            title_ranking = get_ranking(2, SQL("1"))
+            body_ranking = get_ranking(3, body_score)
+
+        return SQL('''
             WITH
             articles_matching_with_title_and_body AS (
                 SELECT knowledge_article.id AS id,
                        1 AS order,
-                       ts_rank_cd(to_tsvector('knowledge_config', knowledge_article.name), %(ts_query)s) AS score
+                       %(title_and_body_score)s AS score
                   FROM knowledge_article
-                 WHERE knowledge_article.name ILIKE %(search_pattern)s
-                   AND to_tsvector('knowledge_config', knowledge_article.body) @@ %(ts_query)s
+                 WHERE %(title_match)s
+                   AND (%(body_match)s)
                    AND %(sql_where_clause)s
+                   %(title_and_body_ranking)s
                  LIMIT %(cut_off)s
             ),
             articles_matching_with_title AS (
@@ -1632,24 +2219,22 @@ class Article(models.Model):
                        2 AS order,
                        1 AS score
                   FROM knowledge_article
-                 WHERE knowledge_article.name ILIKE %(search_pattern)s
-                   AND knowledge_article.id NOT IN (
-                       SELECT id FROM articles_matching_with_title_and_body)
+                 WHERE %(title_match)s
+                   AND %(title_exclusion)s
                    AND %(sql_where_clause)s
+                   %(title_ranking)s
                  LIMIT %(cut_off)s
                     - (SELECT COUNT(*) FROM articles_matching_with_title_and_body)
             ),
             articles_matching_with_body AS (
                 SELECT knowledge_article.id AS id,
                        3 AS order,
-                       ts_rank_cd(to_tsvector('knowledge_config', knowledge_article.body), %(ts_query)s) AS score
+                       %(body_score)s AS score
                   FROM knowledge_article
-                 WHERE to_tsvector('knowledge_config', knowledge_article.body) @@ %(ts_query)s
-                   AND knowledge_article.id NOT IN (
-                        SELECT id FROM articles_matching_with_title_and_body
-                        UNION ALL
-                        SELECT id FROM articles_matching_with_title)
+                 WHERE (%(body_match)s)
+                   AND %(body_exclusion)s
                    AND %(sql_where_clause)s
+                   %(body_ranking)s
                  LIMIT %(cut_off)s
                     - (SELECT COUNT(*) FROM articles_matching_with_title_and_body)
                     - (SELECT COUNT(*) FROM articles_matching_with_title)
@@ -1660,20 +2245,20 @@ class Article(models.Model):
                 SELECT * FROM articles_matching_with_title
                 UNION ALL
                 SELECT * FROM articles_matching_with_body
-            )
+            )%(facet_counts_cte)s
             SELECT
                 knowledge_article.id,
                 knowledge_article.icon,
                 knowledge_article.name,
-                CASE WHEN to_tsvector('knowledge_config', knowledge_article.body) @@ %(ts_query)s
-                     THEN ts_headline('knowledge_config', knowledge_article.body, %(ts_query)s,
-                            'StartSel=<strong>, StopSel=</strong>, MaxWords=20, MinWords=10, MaxFragments=3')
-                     ELSE NULL END AS "headline",
+                %(body_headline)s AS "headline",
                 COALESCE(CAST(article_favorite.id AS BOOLEAN), FALSE) AS is_user_favorite,
                 knowledge_article.root_article_id,
                 root_article.id AS root_article_id,
                 root_article.icon AS root_article_icon,
-                root_article.name AS root_article_name
+                root_article.name AS root_article_name,
+                all_matching_articles.order AS search_order,
+                all_matching_articles.score AS search_score
+                %(facet_counts_column)s
               FROM all_matching_articles
          LEFT JOIN knowledge_article
                 ON knowledge_article.id = all_matching_articles.id
@@ -1689,17 +2274,188 @@ class Article(models.Model):
              LIMIT %(limit)s
             ''',
             sql_where_clause=query.where_clause,
+            title_match=title_match,
+            title_and_body_score=title_and_body_score,
+            title_exclusion=title_exclusion,
+            body_exclusion=body_exclusion,
+            title_and_body_ranking=title_and_body_ranking,
+            title_ranking=title_ranking,
+            body_ranking=body_ranking,
+            body_match=body_match,
+            body_score=body_score,
+            body_headline=body_headline,
+            facet_counts_cte=self._get_search_facets_cte() if with_facets else SQL(),
+            facet_counts_column=SQL('''
+                , (SELECT JSON_AGG(facet_counts) FROM facet_counts) AS facet_counts
+                , (SELECT COUNT(*) FROM all_matching_articles) >= %s AS facets_truncated
+            ''', cut_off) if with_facets else SQL(),
+            user_id=self.env.user.id,
+            cut_off=cut_off,
+            limit=limit
+        )
+
+    def _prepare_sorted_articles_page(self, articles, facet_counts=(), facets_truncated=False,
+                                      next_cursor=False, with_facets=False, with_cursor=False):
+        """ Wrap the articles found by ``get_user_sorted_articles`` with their
+        facet counts and pagination cursor, when requested. """
+        if not with_facets and not with_cursor:
+            return articles
+        result = {'articles': articles}
+        if with_facets:
+            result['facets'] = self._prepare_search_facets(facet_counts)
+            result['facets_truncated'] = facets_truncated
+        if with_cursor:
+            result['next_cursor'] = next_cursor
+        return result
+
+    def get_user_sorted_articles_extended(self, search_query, limit=40, hidden_mode=False):
+        """ Extended version of ``get_user_sorted_articles`` also looking into
+            the comments of the articles (the anchor text of their threads and
+            the messages posted on them) and into the property values of the
+            article items.
+
+            Every source is matched through its own GIN index (see ``init``),
+            and all of them share the budget of `knowledge.fts_search_cut_off`
+            candidates, read source by source (title and body, comments, then
+            properties), so that the whole search stays within one query and
+            one candidate budget. The matches are then grouped by article and
+            ranked together: an article matching with its title, its body and
+            some comments ranks higher than an article matching with only one
+            of them.
+
+            On top of the values returned by ``get_user_sorted_articles``, each
+            result holds the list of sources it matched with (`matches`, among
+            'title', 'body', 'comment' and 'property') and the ids of the
+            matching comment threads (`thread_ids`).
+
+        :param str search_query: Search terms of the user
+        :param int limit: Maximal number of articles to return
+        :param bool hidden_mode: If True, scope the search to the hidden articles.
+                                 If False, scope the search to the visible articles.
+        """
+        if not search_query:
+            return self.get_user_sorted_articles(search_query, limit=limit, hidden_mode=hidden_mode)
+
+        query = self._search(self._get_user_sorted_articles_domain(hidden_mode))
+        search_pattern = '%' + re.sub(r'(%|_|\\)', r'\\\1', search_query) + '%'
+        ts_query = SQL("plainto_tsquery('knowledge_config', %s)", search_query)
+        cut_off = self._get_fts_search_cut_off(limit)
+        body_match, body_score, body_headline = self._get_fts_body_clauses(search_query)
+        self.env['knowledge.article.thread'].flush_model(['article_id', 'article_anchor_text'])
+        self.env['mail.message'].flush_model(['model', 'res_id', 'message_type', 'body'])
+
+        self.env.cr.execute(SQL('''
+            WITH
+            matching_articles AS (
+                SELECT knowledge_article.id AS article_id,
+                       ARRAY_REMOVE(ARRAY[
+                           CASE WHEN knowledge_article.name ILIKE %(search_pattern)s THEN 'title' END,
+                           CASE WHEN %(body_match)s THEN 'body' END
+                       ], NULL) AS sources,
+                       CASE WHEN knowledge_article.name ILIKE %(search_pattern)s
+                            THEN 1 ELSE 0 END
+                       + CASE WHEN %(body_match)s THEN %(body_score)s ELSE 0 END AS score,
+                       NULL::integer AS thread_id
+                  FROM knowledge_article
+                 WHERE (knowledge_article.name ILIKE %(search_pattern)s OR %(body_match)s)
+                   AND %(sql_where_clause)s
+            ),
+            matching_thread_anchors AS (
+                SELECT thread.article_id,
+                       ARRAY['comment'] AS sources,
+                       ts_rank_cd(to_tsvector('knowledge_config', thread.article_anchor_text), %(ts_query)s) AS score,
+                       thread.id AS thread_id
+                  FROM knowledge_article_thread thread
+                  JOIN knowledge_article
+                    ON knowledge_article.id = thread.article_id
+                 WHERE to_tsvector('knowledge_config', thread.article_anchor_text) @@ %(ts_query)s
+                   AND %(sql_where_clause)s
+            ),
+            matching_thread_messages AS (
+                SELECT thread.article_id,
+                       ARRAY['comment'] AS sources,
+                       ts_rank_cd(to_tsvector('knowledge_config', message.body), %(ts_query)s) AS score,
+                       thread.id AS thread_id
+                  FROM mail_message message
+                  JOIN knowledge_article_thread thread
+                    ON thread.id = message.res_id
+                  JOIN knowledge_article
+                    ON knowledge_article.id = thread.article_id
+                 WHERE message.model = 'knowledge.article.thread'
+                   AND message.message_type = 'comment'
+                   AND to_tsvector('knowledge_config', message.body) @@ %(ts_query)s
+                   AND %(sql_where_clause)s
+            ),
+            matching_properties AS (
+                SELECT knowledge_article.id AS article_id,
+                       ARRAY['property'] AS sources,
+                       ts_rank_cd(%(properties_vector)s, %(ts_query)s) AS score,
+                       NULL::integer AS thread_id
+                  FROM knowledge_article
+                 WHERE knowledge_article.is_article_item IS TRUE
+                   AND %(properties_vector)s @@ %(ts_query)s
+                   AND %(sql_where_clause)s
+            ),
+            all_matches AS (
+                (SELECT * FROM matching_articles
+                 UNION ALL
+                 SELECT * FROM matching_thread_anchors
+                 UNION ALL
+                 SELECT * FROM matching_thread_messages
+                 UNION ALL
+                 SELECT * FROM matching_properties)
+                 LIMIT %(cut_off)s
+            ),
+            matches_by_article AS (
+                SELECT all_matches.article_id,
+                       SUM(all_matches.score) FILTER (WHERE match_source.position = 1) AS score,
+                       ARRAY_AGG(DISTINCT match_source.source) AS matches,
+                       ARRAY_REMOVE(ARRAY_AGG(DISTINCT all_matches.thread_id), NULL) AS thread_ids
+                  FROM all_matches
+            CROSS JOIN LATERAL UNNEST(all_matches.sources) WITH ORDINALITY AS match_source(source, position)
+              GROUP BY all_matches.article_id
+            )
+            SELECT
+                knowledge_article.id,
+                knowledge_article.icon,
+                knowledge_article.name,
+                %(body_headline)s AS "headline",
+                COALESCE(CAST(article_favorite.id AS BOOLEAN), FALSE) AS is_user_favorite,
+                root_article.id AS root_article_id,
+                root_article.icon AS root_article_icon,
+                root_article.name AS root_article_name,
+                matches_by_article.matches,
+                matches_by_article.thread_ids
+              FROM matches_by_article
+              JOIN knowledge_article
+                ON knowledge_article.id = matches_by_article.article_id
+         LEFT JOIN knowledge_article AS root_article
+                ON knowledge_article.root_article_id = root_article.id
+         LEFT JOIN knowledge_article_favorite article_favorite
+                ON knowledge_article.id = article_favorite.article_id
+               AND article_favorite.user_id = %(user_id)s
+          ORDER BY matches_by_article.score DESC,
+                   is_user_favorite DESC,
+                   knowledge_article.id DESC
+             LIMIT %(limit)s
+            ''',
+            sql_where_clause=query.where_clause,
             search_pattern=search_pattern,
             ts_query=ts_query,
+            body_match=body_match,
+            body_score=body_score,
+            body_headline=body_headline,
+            properties_vector=SQL(
+                "jsonb_to_tsvector('knowledge_config', knowledge_article.article_properties, '[\"string\"]')"),
             user_id=self.env.user.id,
             cut_off=cut_off,
             limit=limit
         ))
+        return self._prepare_sorted_articles_results(self.env.cr.dictfetchall())
 
-        sorted_articles = self.env.cr.dictfetchall()
-
-        # Create a tuple with the id and name_get for root_article_id to
-        # mimic the result of a read.
+    def _prepare_sorted_articles_results(self, sorted_articles):
+        """ Format the rows fetched by the search queries of the command palette
+        (see ``get_user_sorted_articles``) to mimic the result of a read. """
         for sorted_article in sorted_articles:
             if sorted_article['icon'] is None:
                 sorted_article['icon'] = False
@@ -1718,6 +2474,153 @@ class Article(models.Model):
                 del sorted_article['headline']
         return sorted_articles
 
+    @api.model
+    def _get_fts_search_cut_off(self, limit):
+        """ Maximum number of candidates considered by the search of the
+        articles (see ``get_user_sorted_articles``), at least the given limit. """
+        cut_off = self.env['ir.config_parameter'].sudo().get_param('knowledge.fts_search_cut_off', 100)
+        return max(int(cut_off), limit)
+
+    @api.model
+    def _get_search_facets_cte(self):
+        """ CTE counting the candidates selected by ``get_user_sorted_articles``
+        ('all_matching_articles') for each facet, using one grouping set per
+        facet. The 'facet' column tells which grouping set a row belongs to. """
+        return SQL('''
+            ,
+            facet_counts AS (
+                SELECT CASE WHEN GROUPING(knowledge_article.category) = 0 THEN 'category'
+                            WHEN GROUPING(root_article.id) = 0 THEN 'root_article_id'
+                            WHEN GROUPING(article_favorite.id IS NOT NULL) = 0 THEN 'is_user_favorite'
+                            ELSE 'is_article_item'
+                       END AS facet,
+                       knowledge_article.category,
+                       root_article.id AS root_article_id,
+                       root_article.icon AS root_article_icon,
+                       root_article.name AS root_article_name,
+                       article_favorite.id IS NOT NULL AS is_user_favorite,
+                       COALESCE(knowledge_article.is_article_item, FALSE) AS is_article_item,
+                       COUNT(*) AS count
+                  FROM all_matching_articles
+                  JOIN knowledge_article
+                    ON knowledge_article.id = all_matching_articles.id
+             LEFT JOIN knowledge_article AS root_article
+                    ON knowledge_article.root_article_id = root_article.id
+             LEFT JOIN knowledge_article_favorite article_favorite
+                    ON knowledge_article.id = article_favorite.article_id
+                   AND article_favorite.user_id = %(user_id)s
+              GROUP BY GROUPING SETS (
+                    (knowledge_article.category),
+                    (root_article.id, root_article.icon, root_article.name),
+                    (article_favorite.id IS NOT NULL),
+                    (COALESCE(knowledge_article.is_article_item, FALSE))
+                )
+            )''', user_id=self.env.user.id)
+
+    def _prepare_search_facets(self, facet_counts):
+        """ Format the rows of the 'facet_counts' CTE (see ``_get_search_facets_cte``)
+        as a dict giving, for each facet, a list of (value, count) sorted by
+        decreasing count. Root articles are given as (id, display_name) tuples
+        to mimic the result of a read. """
+        facets = {'category': [], 'root_article_id': [], 'is_user_favorite': [], 'is_article_item': []}
+        for facet_count in facet_counts:
+            facet = facet_count['facet']
+            if facet == 'root_article_id':
+                value = (facet_count['root_article_id'], "%s %s" % (
+                    facet_count['root_article_icon'] or self._get_no_icon_placeholder(),
+                    facet_count['root_article_name'] or _('Untitled')
+                ))
+            else:
+                value = facet_count[facet]
+            facets[facet].append((value, facet_count['count']))
+        for values in facets.values():
+            values.sort(key=lambda value_count: value_count[1], reverse=True)
+        return facets
+
+    @api.model
+    def _get_fts_body_clauses(self, search_query):
+        """ Build the SQL clauses used to match, rank and highlight the body of
+        the articles with the given search terms. The body is checked against
+        every text search configuration returned by ``_get_fts_search_configs``
+        so that each of them can use its own GIN index.
+
+        :param str search_query: Search terms of the user
+        :return tuple: (match, score, headline) SQL clauses
+        """
+        matches, scores, headlines = [], [], []
+        for config in self._get_fts_search_configs():
+            ts_vector = SQL("to_tsvector(%s, knowledge_article.body)", config)
+            ts_query = SQL("plainto_tsquery(%s, %s)", config, search_query)
+            match = SQL("%s @@ %s", ts_vector, ts_query)
+            matches.append(match)
+            scores.append(SQL("ts_rank_cd(%s, %s)", ts_vector, ts_query))
+            headlines.append(SQL(
+                "WHEN %s THEN ts_headline(%s, knowledge_article.body, %s, %s)",
+                match, config, ts_query,
+                'StartSel=<strong>, StopSel=</strong>, MaxWords=20, MinWords=10, MaxFragments=3'))
+        return (
+            SQL(" OR ").join(matches),
+            scores[0] if len(scores) == 1 else SQL("GREATEST(%s)", SQL(", ").join(scores)),
+            SQL("CASE %s ELSE NULL END", SQL(" ").join(headlines)),
+        )
+
+    @api.model
+    def _get_fts_search_configs(self):
+        """ Return the text search configurations to use when searching in the
+        body of the articles: the language agnostic 'knowledge_config', followed
+        by the enabled stemmed configurations matching the language of the user
+        or the language of the current company. """
+        configs = ['knowledge_config']
+        language_configs = self._get_fts_language_configs()
+        if not language_configs:
+            return configs
+        for lang in (self.env.user.lang, self.env.company.partner_id.lang):
+            config = FTS_LANGUAGE_CONFIGS.get((lang or '').split('_')[0])
+            if config in language_configs and config not in configs:
+                configs.append(config)
+        return configs
+
+    @api.model
+    def _get_fts_language_configs(self, indexed_only=True):
+        """ Return the stemmed text search configurations enabled through the
+        'knowledge.fts_language_configs' parameter (comma-separated names of
+        PostgreSQL configurations, e.g. "english,french"). Unknown names are
+        ignored.
+
+        :param bool indexed_only: only return the configurations whose index
+          of the bodies is built (see ``_get_fts_index_changes``), as searching
+          with the others would scan the bodies of all the articles;
+        """
+        param = self.env['ir.config_parameter'].sudo().get_param('knowledge.fts_language_configs') or ''
+        return list(self._get_existing_fts_configs(tuple(
+            config.strip() for config in param.split(',')
+            if config.strip() in FTS_LANGUAGE_CONFIGS.values()
+        ), indexed_only))
+
+    @ormcache('configs', 'indexed_only')
+    def _get_existing_fts_configs(self, configs, indexed_only):
+        if not configs:
+            return ()
+        self.env.cr.execute(
+            SQL("SELECT cfgname FROM pg_ts_config WHERE cfgname IN %s", configs))
+        existing = {cfgname for cfgname, in self.env.cr.fetchall()}
+        if indexed_only:
+            self.env.cr.execute(SQL(
+                """
+                SELECT index.relname
+                  FROM pg_index
+                  JOIN pg_class index ON index.oid = pg_index.indexrelid
+                 WHERE index.relname IN %s AND pg_index.indisvalid
+                """,
+                tuple(make_index_name(self._table, f'body_{config}') for config in configs),
+            ))
+            index_names = {index_name for index_name, in self.env.cr.fetchall()}
+            existing = {
+                config for config in existing
+                if make_index_name(self._table, f'body_{config}') in index_names
+            }
+        return tuple(config for config in configs if config in existing)
+
     # ------------------------------------------------------------
     # PERMISSIONS / MEMBERS MANAGEMENT
     # ------------------------------------------------------------
@@ -2681,6 +3584,229 @@ class Article(models.Model):
     # BUSINESS METHODS
     # ------------------------------------------------------------
 
+    def get_body_blocks(self, cursor=0, limit=BODY_BLOCKS_LIMIT):
+        """ Return the top-level blocks of the body of the article, starting at
+        the given cursor. Huge bodies can be loaded block by block: the first
+        blocks can be displayed while the next ones are loading, and only the
+        requested part of the body is read from the database.
+
+        :param int cursor: position in the body of the first block to return, as
+          returned by the previous call (0 to get the first blocks);
+        :param int limit: maximum number of blocks to return;
+        :return dict: with keys
+          - 'blocks': list of the html of the blocks;
+          - 'cursor': position of the next blocks, False when the end of the
+            body is reached;
+          - 'body_size': size of the whole body, in bytes;
+        """
+        self.ensure_one()
+        self.check_access('read')
+        self.flush_recordset(['body'])
+        text, text_end, chunk_size = '', cursor, BODY_CHUNK_SIZE
+        while True:
+            self.env.cr.execute(SQL(
+                "SELECT substring(body FROM %s FOR %s) FROM knowledge_article WHERE id = %s",
+                text_end + 1, chunk_size, self.id,
+            ))
+            chunk = self.env.cr.fetchone()[0] or ''
+            text += chunk
+            text_end += len(chunk)
+            is_complete = len(chunk) < chunk_size
+            blocks, blocks_length = self._split_body_blocks(text, limit, is_complete)
+            if len(blocks) >= limit or is_complete:
+                break
+            chunk_size *= 2
+
+        next_cursor = cursor + blocks_length
+        return {
+            'blocks': blocks,
+            'cursor': next_cursor if not is_complete or next_cursor < text_end else False,
+            'body_size': self.body_size,
+        }
+
+    def get_embedded_views_data(self, embedded_views):
+        """ Return the data of the first page of all the embedded views of the
+        article at once, so that they are rendered without each of them having
+        to fetch its records separately after the body is rendered.
+
+        The access to the article and to the models of the views is checked
+        once for all the views; the records are then fetched as by the views
+        themselves, the record rules being applied.
+
+        :param list embedded_views: descriptors of the embedded views, as dicts
+          with keys
+          - 'id': identifier of the embedded view in the body;
+          - 'res_model': model of the records listed by the view;
+          - 'view_type': type of the view ('kanban', 'list', 'calendar', ...);
+          - 'domain': domain of the records listed by the view;
+          - 'context': context of the view (optional);
+          - 'specification': fields to read, as given to ``web_search_read``;
+          - 'groupby': fields to group the records by (optional), in which
+            case the groups are read with ``web_read_group``;
+          - 'aggregates': aggregated fields of the groups (optional);
+          - 'order': order of the records or of the groups (optional);
+          - 'limit': number of records or groups to read (optional);
+        :return dict: data of the views by id, as a dict with either a 'data'
+          key with the result of ``web_search_read`` or ``web_read_group``, or
+          an 'error' key if the data of the view cannot be read;
+        """
+        self.ensure_one()
+        self.check_access('read')
+        model_access = {}
+        embedded_views_data = {}
+        for embedded_view in embedded_views:
+            res_model = embedded_view.get('res_model')
+            if res_model not in model_access:
+                model_access[res_model] = res_model in self.env and self.env[res_model].has_access('read')
+            if not model_access[res_model]:
+                embedded_views_data[embedded_view['id']] = {
+                    'error': _('You are not allowed to access these records.'),
+                }
+                continue
+            Model = self.env[res_model].with_context(embedded_view.get('context') or {})
+            limit = embedded_view.get('limit') or EMBEDDED_VIEW_LIMITS.get(embedded_view.get('view_type'))
+            try:
+                if embedded_view.get('groupby'):
+                    data = Model.web_read_group(
+                        embedded_view.get('domain') or [],
+                        embedded_view.get('aggregates') or [],
+                        embedded_view['groupby'],
+                        limit=limit,
+                        orderby=embedded_view.get('order') or False,
+                    )
+                else:
+                    data = Model.web_search_read(
+                        embedded_view.get('domain') or [],
+                        embedded_view.get('specification') or {},
+                        limit=limit,
+                        order=embedded_view.get('order'),
+                    )
+            except (AccessError, UserError, ValueError) as e:
+                embedded_views_data[embedded_view['id']] = {'error': str(e)}
+                continue
+            embedded_views_data[embedded_view['id']] = {'data': data}
+        return embedded_views_data
+
+    def write_body_changes(self, base_checksum, changes):
+        """ Save changes of the body made on its top-level blocks (see
+        ``get_body_blocks``), typically from an autosave. Only the changed
+        blocks are sent and sanitized, instead of the whole body.
+
+        The changes have to be based on the current body, given by its checksum
+        (see ``body_checksum``): otherwise the body has been saved meanwhile,
+        and the changes are refused. This replaces the history divergence check
+        done by ``write``.
+
+        :param str base_checksum: checksum of the body the changes are based on;
+        :param list changes: changes applied in the given order, as dicts with
+          keys 'index' (of the first changed block, in the blocks resulting from
+          the previous changes), 'remove' (number of blocks to remove) and
+          'insert' (list of the html of the blocks to insert);
+        :return str: checksum of the new body;
+        """
+        self.ensure_one()
+        self.check_access('write')
+        if not changes:
+            return base_checksum
+        self.flush_recordset()
+        # lock the article so that concurrent changes are applied one after the other
+        self.env.cr.execute(SQL(
+            "SELECT body FROM knowledge_article WHERE id = %s FOR NO KEY UPDATE",
+            self.id,
+        ))
+        body = self.env.cr.fetchone()[0] or ''
+        if hashlib.sha1(body.encode()).hexdigest() != base_checksum:
+            raise ValidationError(_("The article has been modified in the meantime, reload it to get the changes."))
+
+        body_field = self._fields['body']
+        blocks = self._split_body_blocks(body, len(body) + 1, True)[0]
+        for change in changes:
+            index, remove = change.get('index'), change.get('remove', 0)
+            if not isinstance(index, int) or not isinstance(remove, int) \
+               or not 0 <= index <= len(blocks) or not 0 <= remove <= len(blocks) - index:
+                raise ValidationError(_("The changes of the article do not match its content."))
+            blocks[index:index + remove] = [
+                body_field.convert_to_cache(self._extract_inline_images(block)[0], self) or ''
+                for block in change.get('insert', [])
+            ]
+        new_body = ''.join(blocks)
+        if new_body == body:
+            return base_checksum
+
+        history = self.html_field_history or {}
+        revisions = history.setdefault('body', [])
+        if patch := generate_patch(new_body, body):
+            revisions.insert(0, {
+                'patch': patch,
+                'revision_id': revisions[0]['revision_id'] + 1 if revisions else 1,
+                'create_date': self.env.cr.now().isoformat(),
+                'create_uid': self.env.uid,
+                'create_user_name': self.env.user.name,
+            })
+            del revisions[self._html_field_history_size_limit:]
+        self.env.cr.execute(SQL(
+            """
+            UPDATE knowledge_article
+               SET body = %(body)s, html_field_history = %(history)s,
+                   last_edition_date = %(now)s, last_edition_uid = %(uid)s,
+                   write_date = %(now)s, write_uid = %(uid)s
+             WHERE id = %(id)s
+            """,
+            body=new_body,
+            history=json.dumps(history),
+            now=self.env.cr.now(),
+            uid=self.env.uid,
+            id=self.id,
+        ))
+        # the body is saved without ``write``: recompute the fields depending
+        # on it (e.g. 'body_size') and update the links as ``write`` does
+        self.invalidate_recordset()
+        self.modified(['body'])
+        self._update_article_links()
+        return hashlib.sha1(new_body.encode()).hexdigest()
+
+    @api.model
+    def _split_body_blocks(self, text, limit, is_complete):
+        """ Split the beginning of a part of a body into top-level blocks. The
+        body being sanitized, its tags are simply tokenized instead of parsing
+        the whole document.
+
+        :param str text: part of the body, starting at a block boundary;
+        :param int limit: maximum number of blocks to return;
+        :param bool is_complete: whether the text goes up to the end of the
+          body. Otherwise, the last unclosed block is left out;
+        :return tuple: the blocks, and the length of the text they span;
+        """
+        blocks, block_start, depth = [], 0, 0
+        for match in BODY_TAG_RE.finditer(text):
+            is_closing, tag, is_self_closing = match.groups()
+            if tag and is_closing:
+                depth = max(depth - 1, 0)
+            elif tag and not is_self_closing and tag.lower() not in html.defs.empty_tags:
+                depth += 1
+            if depth:
+                continue
+            blocks.append(text[block_start:match.end()])
+            block_start = match.end()
+            if len(blocks) >= limit:
+                return blocks, block_start
+        if is_complete:
+            if text[block_start:].strip():
+                blocks.append(text[block_start:])
+            block_start = len(text)
+        return blocks, block_start
+
+    @api.model
+    def _get_body_sanitize_cache_stats(self):
+        """ Return the statistics of the cache of the sanitized bodies (see
+        ``BodyHtml``), to measure its benefit. """
+        with BODY_SANITIZE_CACHE_STATS_LOCK:
+            return {
+                'hits': BODY_SANITIZE_CACHE_STATS['hits'],
+                'misses': BODY_SANITIZE_CACHE_STATS['misses'],
+                'size': len(BODY_SANITIZE_CACHE),
+            }
+
     def create_article_from_template(self):
         self.ensure_one()
         article = self.env["knowledge.article"].article_create(is_private=True)
@@ -2869,10 +3995,417 @@ class Article(models.Model):
                 (_("New"), 0, False), (_("Ongoing"), 1, False), (_("Done"), 2, True)]
             ])
 
+    # ------------------------------------------------------------
+    # HISTORY
+    # ------------------------------------------------------------
+
+    def html_field_history_get_content_at_revision(self, field_name, revision_id):
+        """ Override to support the compressed patches of the compacted history
+        (see ``_compact_body_history``). """
+        self.ensure_one()
+        content = self[field_name]
+        for revision in self.html_field_history[field_name]:
+            if revision['revision_id'] < revision_id:
+                break
+            content = apply_patch(content, self._get_history_patch(revision))
+        return content
+
+    @api.model
+    def _get_body_history_limit(self):
+        history_limit = self.env['ir.config_parameter'].sudo().get_param(
+            'knowledge.knowledge_article_history_limit')
+        try:
+            return max(int(history_limit), 1)
+        except (TypeError, ValueError):
+            return self.DEFAULT_ARTICLE_HISTORY_LIMIT
+
+    @api.model
+    def _get_body_history_bucket(self, create_date, now):
+        """ Return the period of time of which the history keeps a single
+        revision, given the date of the revision: all the revisions of the last
+        day are kept, then one revision per hour during a month and one
+        revision per day afterwards.
+
+        :return: the period of the revision, None if the revision is kept;
+        """
+        age = now - create_date
+        if age < timedelta(days=1):
+            return None
+        if age < timedelta(days=30):
+            return create_date.strftime('%Y-%m-%d %H')
+        return create_date.strftime('%Y-%m-%d')
+
+    @api.model
+    def _get_history_patch(self, revision):
+        patch = revision['patch']
+        if patch.startswith(self.HISTORY_COMPRESSED_PATCH_PREFIX):
+            return zlib.decompress(base64.b64decode(patch[len(self.HISTORY_COMPRESSED_PATCH_PREFIX):])).decode()
+        return patch
+
+    @api.model
+    def _compress_history_patch(self, patch):
+        compressed_patch = self.HISTORY_COMPRESSED_PATCH_PREFIX + base64.b64encode(zlib.compress(patch.encode())).decode()
+        return compressed_patch if len(compressed_patch) < len(patch) else patch
+
+    def _compact_body_history(self):
+        """ Thin the history of the body of the articles: the most recent
+        revisions are kept, older ones are thinned into hourly then daily
+        snapshots (see ``_get_body_history_bucket``), and at most
+        ``_get_body_history_limit`` revisions are kept.
+
+        As each revision stores the patch to apply to the next revision to get
+        its content, the patches of the kept revisions are regenerated against
+        the previous kept revision. The patches of the thinned periods are not
+        read anymore on a daily basis: they are stored compressed. The history
+        is written directly, to not count as an edition of the articles. """
+        self.flush_recordset(['body', 'html_field_history'])
+        now = self.env.cr.now()
+        history_limit = self._get_body_history_limit()
+        for article in self:
+            history = article.html_field_history or {}
+            revisions = history.get('body')
+            if not revisions:
+                continue
+            is_recent_by_revision_id = {}
+            buckets = set()
+            for revision in revisions[:history_limit]:
+                bucket = self._get_body_history_bucket(datetime.fromisoformat(revision['create_date']), now)
+                if bucket is None or bucket not in buckets:
+                    is_recent_by_revision_id[revision['revision_id']] = bucket is None
+                    buckets.add(bucket)
+            if len(is_recent_by_revision_id) == len(revisions) and all(
+                is_recent or revision['patch'].startswith(self.HISTORY_COMPRESSED_PATCH_PREFIX)
+                for revision, is_recent in zip(revisions, is_recent_by_revision_id.values())
+            ):
+                continue
+
+            content = kept_content = article.body or ''
+            kept_revisions = []
+            for revision in revisions:
+                if len(kept_revisions) == len(is_recent_by_revision_id):
+                    break
+                content = apply_patch(content, self._get_history_patch(revision))
+                is_recent = is_recent_by_revision_id.get(revision['revision_id'])
+                if is_recent is None:
+                    continue
+                patch = generate_patch(kept_content, content) if kept_content != content else ''
+                kept_revisions.append(dict(
+                    revision,
+                    patch=patch if is_recent else self._compress_history_patch(patch),
+                ))
+                kept_content = content
+            history['body'] = [revision for revision in kept_revisions if revision['patch']]
+            self.env.cr.execute(SQL(
+                "UPDATE knowledge_article SET html_field_history = %s WHERE id = %s",
+                json.dumps(history), article.id,
+            ))
+        self.invalidate_recordset(['html_field_history', 'html_field_history_metadata'])
+
+    # ------------------------------------------------------------
+    # EXPORT
+    # ------------------------------------------------------------
+
+    def _export_subtree(self, fileobj, export_format='html', cursor=False, limit=EXPORT_ARTICLES_LIMIT):
+        """ Write the article and its descendants into a zip archive, walking
+        the subtree in ``parent_path`` order. The articles are read and written
+        in the archive by batches, so that the memory used does not depend on
+        the size of the subtree.
+
+        Each article is written as a file, its children, attachments and cover
+        going into a folder of the same name. The links to the exported
+        attachments are replaced by the path of their file in the archive.
+
+        Huge subtrees are exported in several archives: the export stops after
+        ``limit`` articles, and is resumed from the returned cursor.
+
+        :param fileobj: binary file-like object in which the archive is written;
+        :param str export_format: 'html' or 'markdown', see ``EXPORT_FORMATS``;
+        :param str cursor: resume the export after the given cursor, as returned
+          by the previous export of the subtree;
+        :param int limit: maximum number of articles exported in the archive;
+        :return str: cursor from which the export has to be resumed, False when
+          all the articles of the subtree have been exported;
+        """
+        self.ensure_one()
+        self.check_access('read')
+        if export_format not in EXPORT_FORMATS:
+            raise ValidationError(_("Articles can only be exported as HTML or Markdown."))
+        query = self._search([('parent_path', '=like', f'{self.parent_path}%')])
+        parent_path_sql = SQL('%s COLLATE "C"', SQL.identifier(query.table, 'parent_path'))
+        if cursor:
+            query.add_where(SQL('%s > %s', parent_path_sql, cursor))
+        query.order = parent_path_sql
+        query.limit = limit + 1
+        self.env.cr.execute(query.select(
+            SQL.identifier(query.table, 'id'),
+            SQL.identifier(query.table, 'parent_path'),
+        ))
+        rows = self.env.cr.fetchall()
+
+        path_by_article_id = {}
+        with zipfile.ZipFile(fileobj, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+            for batch in split_every(EXPORT_BATCH_SIZE, rows[:limit]):
+                articles = self.browse([article_id for article_id, _parent_path in batch])
+                articles.fetch(['name', 'body', 'parent_path', 'cover_image_id'])
+                attachments_by_article_id = defaultdict(list)
+                for attachment in self.env['ir.attachment'].search([
+                    ('res_model', '=', 'knowledge.article'),
+                    ('res_id', 'in', articles.ids),
+                    ('type', '=', 'binary'),
+                ], order='id'):
+                    attachments_by_article_id[attachment.res_id].append(attachment)
+                for article in articles:
+                    path = self._get_export_path(article, path_by_article_id)
+                    folder_name = path.rsplit('/', 1)[-1]
+                    files = {}
+                    for attachment in attachments_by_article_id[article.id]:
+                        file_name = f'{attachment.id}-{self._get_export_file_name(attachment.name)}'
+                        self._export_attachment(archive, attachment, f'{path}/{file_name}')
+                        files[attachment.id] = f'{quote(folder_name)}/{quote(file_name)}'
+                    cover_url = False
+                    if cover_attachment := article.cover_image_id.attachment_id.sudo():
+                        if cover_attachment.url:
+                            cover_url = cover_attachment.url
+                        else:
+                            file_name = f'cover{os.path.splitext(cover_attachment.name or "")[1]}'
+                            self._export_attachment(archive, cover_attachment, f'{path}/{file_name}')
+                            cover_url = f'{quote(folder_name)}/{quote(file_name)}'
+                    body = EXPORT_ATTACHMENT_URL_RE.sub(
+                        lambda match: files.get(int(match.group(1)), match.group(0)), article.body or '')
+                    archive.writestr(
+                        f'{path}{EXPORT_FORMATS[export_format]}',
+                        self._export_article_content(article, body, cover_url, export_format),
+                    )
+                articles.invalidate_recordset(['body'])
+        return rows[limit - 1][1] if len(rows) > limit else False
+
+    def _get_export_path(self, article, path_by_article_id):
+        """ Return the path of the given article in the export archive of the
+        current article (see ``_export_subtree``), without extension. The paths
+        of the already exported articles are given by ``path_by_article_id``,
+        in which the path of the article is added. """
+        ancestor_ids = [int(article_id) for article_id in article.parent_path.split('/')[:-2]]
+        ancestor_ids = ancestor_ids[ancestor_ids.index(self.id):] if self.id in ancestor_ids else []
+        if ancestor_ids and ancestor_ids[-1] not in path_by_article_id:
+            # the parent has been exported in a previous archive, or cannot be read
+            path = ''
+            ancestors = self.browse(ancestor_ids)._filtered_access('read')
+            for ancestor_id in ancestor_ids:
+                ancestor = ancestors.browse(ancestor_id)
+                name = f'{self._get_export_file_name(ancestor.name)} ({ancestor_id})' if ancestor in ancestors \
+                    else str(ancestor_id)
+                path = path_by_article_id[ancestor_id] = f'{path}/{name}' if path else name
+        folder_name = f'{self._get_export_file_name(article.name)} ({article.id})'
+        parent_path = path_by_article_id.get(ancestor_ids[-1]) if ancestor_ids else False
+        path = path_by_article_id[article.id] = f'{parent_path}/{folder_name}' if parent_path else folder_name
+        return path
+
+    @api.model
+    def _get_export_file_name(self, name):
+        """ Return the given name, usable as a file name in an archive. """
+        name = re.sub(r'[\x00-\x1f\\/:*?"<>|]+', '_', name or '').strip(' ._')
+        return name[:100] or _('Untitled')
+
+    @api.model
+    def _export_attachment(self, archive, attachment, file_path):
+        """ Write the content of the given attachment into the archive, reading
+        it by chunks from the filestore when possible. """
+        full_path = attachment.store_fname and attachment._full_path(attachment.store_fname)
+        if full_path and os.path.isfile(full_path):
+            archive.write(full_path, file_path)
+        else:
+            archive.writestr(file_path, attachment.raw or b'')
+
+    @api.model
+    def _export_article_content(self, article, body, cover_url, export_format):
+        """ Return the content of the exported file of the given article. """
+        if export_format == 'markdown':
+            cover = f'![]({cover_url})\n\n' if cover_url else ''
+            name = (article.name or _('Untitled')).replace('\n', ' ')
+            return f'{cover}# {name}\n\n{self._html_to_markdown(body)}'
+        return Markup(
+            '<!DOCTYPE html>\n<html><head><meta charset="utf-8"/><title>%(name)s</title></head>'
+            '<body>%(cover)s<h1>%(name)s</h1>%(body)s</body></html>\n'
+        ) % {
+            'name': article.name or _('Untitled'),
+            'cover': Markup('<img src="%s"/>') % cover_url if cover_url else '',
+            'body': Markup(body),
+        }
+
+    @api.model
+    def _html_to_markdown(self, body):
+        """ Convert the given body to Markdown. The elements of the editor that
+        have no Markdown equivalent (embedded views, ...) are dropped, their
+        text being kept. """
+        if is_html_empty(body):
+            return ''
+        fragment = html.fragment_fromstring(body, create_parent='div')
+        markdown = self._html_element_to_markdown(fragment)
+        return re.sub(r'[ \t]*\n[ \t]*\n(\s*\n)*', '\n\n', markdown).strip() + '\n'
+
+    @api.model
+    def _html_element_to_markdown(self, element):
+        tag = element.tag if isinstance(element.tag, str) else ''
+        if tag in ('script', 'style') or not tag:
+            return ''
+        if tag == 'pre':
+            return '\n\n```\n%s\n```\n\n' % element.text_content().strip('\n')
+        if tag == 'br':
+            return '  \n'
+        if tag == 'hr':
+            return '\n\n---\n\n'
+        if tag == 'img':
+            return '![%s](%s)' % (element.get('alt') or '', element.get('src') or '')
+        if tag in ('ul', 'ol'):
+            items = []
+            for index, item in enumerate(element.iterchildren('li'), start=1):
+                if tag == 'ol':
+                    marker = f'{index}. '
+                elif 'o_checklist' in (element.get('class') or ''):
+                    marker = '- [x] ' if 'o_checked' in (item.get('class') or '') else '- [ ] '
+                else:
+                    marker = '- '
+                lines = self._html_element_to_markdown(item).strip().split('\n')
+                items.append(marker + '\n'.join([lines[0]] + [f'    {line}' if line else line for line in lines[1:]]))
+            return '\n\n%s\n\n' % '\n'.join(items)
+        if tag == 'table':
+            rows = [[
+                self._html_element_to_markdown(cell).strip().replace('|', '\\|').replace('\n', ' ')
+                for cell in row.iterchildren('td', 'th')
+            ] for row in element.iter('tr')]
+            if not rows:
+                return ''
+            width = max(len(row) for row in rows)
+            rows = [row + [''] * (width - len(row)) for row in rows]
+            lines = ['| %s |' % ' | '.join(row) for row in rows]
+            lines.insert(1, '|' + ' --- |' * width)
+            return '\n\n%s\n\n' % '\n'.join(lines)
+
+        content = re.sub(r'\s+', ' ', element.text or '')
+        for child in element:
+            content += self._html_element_to_markdown(child) + re.sub(r'\s+', ' ', child.tail or '')
+
+        if tag in ('h1', 'h2', 'h3', 'h4', 'h5', 'h6'):
+            return '\n\n%s %s\n\n' % ('#' * int(tag[1]), content.strip())
+        if tag in ('b', 'strong'):
+            return f'**{content.strip()}**' if content.strip() else content
+        if tag in ('i', 'em'):
+            return f'*{content.strip()}*' if content.strip() else content
+        if tag in ('s', 'del', 'strike'):
+            return f'~~{content.strip()}~~' if content.strip() else content
+        if tag == 'code':
+            return f'`{content}`'
+        if tag == 'a':
+            return f'[{content.strip()}]({element.get("href")})' if element.get('href') else content
+        if tag == 'blockquote':
+            lines = content.strip().split('\n')
+            return '\n\n%s\n\n' % '\n'.join(f'> {line}'.rstrip() for line in lines)
+        if tag in ('p', 'div', 'section'):
+            return '\n\n%s\n\n' % content.strip()
+        return content
+
     # ------------------------------------------------------------
     # TOOLS
     # ------------------------------------------------------------
 
+    def _extract_inline_images(self, body):
+        """ Move the base64 images inlined in the given body (typically pasted
+        screenshots) into attachments of the article, and replace them by
+        their URL. Inline images bloat the row of the article, its history and
+        the text search of the bodies.
+
+        Images already attached to the article are reused, based on their
+        checksum, so that saving the same body again does not duplicate them.
+
+        :param str body: body of the article;
+        :return tuple: the body using the URLs of the images, and the
+          attachments of the images. When the article does not exist yet (empty
+          recordset), the attachments have to be linked to it by the caller;
+        """
+        if not body or 'data:image/' not in body:
+            return body, self.env['ir.attachment']
+        Attachment = self.env['ir.attachment'].sudo()
+
+        image_by_data = {}
+        for match in INLINE_IMAGE_RE.finditer(body):
+            extension, data = match.groups()
+            if data in image_by_data:
+                continue
+            try:
+                raw = base64.b64decode(data)
+            except (binascii.Error, ValueError):
+                continue
+            image_by_data[data] = (Attachment._compute_checksum(raw), extension, raw)
+        if not image_by_data:
+            return body, self.env['ir.attachment']
+
+        attachment_by_checksum = {}
+        if self:
+            attachment_by_checksum = {attachment.checksum: attachment for attachment in Attachment.search([
+                ('res_model', '=', self._name),
+                ('res_id', '=', self.id),
+                ('res_field', '=', False),
+                ('checksum', 'in', [checksum for checksum, _extension, _raw in image_by_data.values()]),
+            ])}
+        new_image_by_checksum = {
+            checksum: (extension, raw)
+            for checksum, extension, raw in image_by_data.values()
+            if checksum not in attachment_by_checksum
+        }
+        new_attachments = Attachment.create([{
+            'name': f'image.{extension}',
+            'raw': raw,
+            'res_model': self._name,
+            'res_id': self.id,
+        } for extension, raw in new_image_by_checksum.values()])
+        attachment_by_checksum.update(zip(new_image_by_checksum, new_attachments))
+        attachments = Attachment.browse([attachment.id for attachment in attachment_by_checksum.values()])
+        url_by_attachment = {
+            attachment: f'/web/image/{attachment.id}?access_token={access_token}'
+            for attachment, access_token in zip(attachments, attachments.generate_access_token())
+        }
+
+        def replace_image(match):
+            image = image_by_data.get(match.group(2))
+            return url_by_attachment[attachment_by_checksum[image[0]]] if image else match.group(0)
+
+        new_body = INLINE_IMAGE_RE.sub(replace_image, body)
+        return Markup(new_body) if isinstance(body, Markup) else new_body, attachments
+
+    @api.model
+    def _extract_inline_images_from_bodies(self, batch_size=100):
+        """ Move the base64 images inlined in the bodies of the existing
+        articles into attachments (see ``_extract_inline_images``), by batches
+        of articles. The bodies and their history are rewritten in place: the
+        same URLs replace the images in the patches of the history, so that
+        the previous versions can still be restored. """
+        self.env.cr.execute(SQL(
+            "SELECT id FROM knowledge_article WHERE body LIKE %s ORDER BY id",
+            '%data:image/%',
+        ))
+        article_ids = [article_id for article_id, in self.env.cr.fetchall()]
+        for batch_ids in split_every(batch_size, article_ids):
+            for article in self.sudo().with_context(active_test=False).browse(batch_ids):
+                body = article._extract_inline_images(article.body)[0]
+                is_changed = body != article.body
+                history = article.html_field_history or {}
+                for revision in history.get('body', []):
+                    patch = article._extract_inline_images(revision['patch'])[0]
+                    if patch != revision['patch']:
+                        revision['patch'] = patch
+                        is_changed = True
+                if not is_changed:
+                    continue
+                self.env.cr.execute(SQL(
+                    """
+                    UPDATE knowledge_article
+                       SET body = %s, body_size = %s, html_field_history = %s
+                     WHERE id = %s
+                    """,
+                    body, len(body.encode()), json.dumps(history) if history else None, article.id,
+                ))
+            self.env.invalidate_all()
+
     @api.model
     def _extract_icon_from_name(self, name):
         """ See name_create / _search_display_name overrides for details. """
@@ -2937,19 +4470,16 @@ class Article(models.Model):
     def get_valid_parent_options(self, search_term=""):
         """ Returns the list of articles that can be set as parent for the
         current article (to avoid recursions) """
-        return self.search_read(
-            domain=[
-                '&', '&', '&', '&', '&',
-                    ('is_template', '=', False),
-                    ('name', 'ilike', search_term),
-                    ('id', 'not in', self.ids),
-                    '!', ('parent_id', 'child_of', self.ids),
-                    ('user_has_access', '=', True),
-                    ('is_article_item', '=', False),
-            ],
-            fields=['id', 'display_name', 'root_article_id'],
-            limit=15,
-        )
+        query = self._search_ranked_by_name([
+            '&', '&', '&', '&', '&',
+                ('is_template', '=', False),
+                ('name', 'ilike', search_term),
+                ('id', 'not in', self.ids),
+                '!', ('parent_id', 'child_of', self.ids),
+                ('user_has_access', '=', True),
+                ('is_article_item', '=', False),
+        ], search_term, limit=15)
+        return self.browse(query).read(['id', 'display_name', 'root_article_id'])
 
     def _get_descendants(self):
         """ Returns the descendants recordset of the current article. """
@@ -3000,17 +4530,46 @@ class Article(models.Model):
             )
         return self.env['knowledge.article']
 
+    @api.model
+    def get_sidebar_children(self, parent_ids):
+        """ Get the children articles (not items) of the given articles, as
+        shown in the sidebar when unfolding them. This allows the sidebar to
+        load the children of several articles at once, e.g. when unfolding all
+        the ancestors of an article.
+
+        :param list parent_ids: ids of the unfolded articles;
+        :return: values of the children, ordered by sequence in their parent
+        :rtype: list
+        """
+        children = self.search(
+            [('parent_id', 'in', parent_ids), ('is_article_item', '=', False)],
+            order='sequence, id',
+        )
+        return children.read(
+            ['name', 'icon', 'parent_id', 'is_locked', 'user_can_write', 'has_article_children'],
+            None,  # To not fetch the name of parent_id
+        )
+
     def _get_accessible_root_ancestors(self):
-        accessible_root_ancestor = self
-        def update_has_access(parent):
-            return parent.has_access('read')
-        accessible_root_ancestors = accessible_root_ancestor if update_has_access(accessible_root_ancestor) else self.env['knowledge.article']
-        while update_has_access(accessible_root_ancestor) and update_has_access(accessible_root_ancestor.parent_id) and accessible_root_ancestor.parent_id.id:
-            accessible_root_ancestor = accessible_root_ancestor.parent_id
-            accessible_root_ancestors |= accessible_root_ancestor
-        return accessible_root_ancestors
-
-    def get_sidebar_articles(self, unfolded_ids=False):
+        """ Return the article and its ancestors, from the closest to the
+        furthest one, up to the first ancestor that is not accessible. The
+        whole hierarchy is read from the parent_path, and the access of all
+        the ancestors is checked at once.
+
+        :return: the accessible articles, the last one being the furthest
+          accessible ancestor (empty if the article is not accessible)
+        """
+        self.ensure_one()
+        hierarchy_ids = [int(article_id) for article_id in reversed(self.sudo().parent_path.split('/')[:-1])]
+        accessible_ids = set(self.with_context(active_test=False).search([('id', 'in', hierarchy_ids)]).ids)
+        accessible_root_ancestor_ids = []
+        for article_id in hierarchy_ids:
+            if article_id not in accessible_ids:
+                break
+            accessible_root_ancestor_ids.append(article_id)
+        return self.browse(accessible_root_ancestor_ids)
+
+    def get_sidebar_articles(self, unfolded_ids=False, change_token=None, known_ids=False, roots_only=False):
         """ Get the data used by the sidebar on load in the form view.
         It returns some information from every article that is accessible by
         the user and that is either:
@@ -3022,6 +4581,25 @@ class Article(models.Model):
             - an ancestor of the current article, if the current article is
               shown
             - a child article of any unfolded article that is shown
+
+        When a change token is given, the sidebar is synchronized incrementally:
+        only the articles that are not known by the client yet, or that changed
+        (or whose ancestors changed with their descendants) since the token was
+        returned, are read. The changes that may have been committed late are
+        sent again (see ``SIDEBAR_CHANGE_TOKEN_WINDOW``). The result then also contains
+        the ordered ids of all the visible articles ('article_ids'), the ids of
+        the known articles that are not visible anymore ('removed_ids') and the
+        token to give for the next synchronization ('change_token'). As the
+        favorites are specific to each user, 'is_user_favorite' should be
+        deduced from 'favorite_ids' for the known articles.
+
+        :param list unfolded_ids: ids of the unfolded articles;
+        :param int change_token: token returned by the last synchronization,
+          0 to get all the articles with a first token;
+        :param list known_ids: ids of the articles known by the client;
+        :param bool roots_only: only return the name, icon, category and
+          parent of the root and favorite articles, as shown by a collapsed
+          sidebar (no unfolded article, no flag);
         """
 
         root_articles_domain = [
@@ -3035,6 +4613,9 @@ class Article(models.Model):
         # this helps avoiding 2 queries done for ACLs (and redundant with the global fetch)
         root_articles_ids = self.env['knowledge.article'].sudo().search(root_articles_domain).ids
 
+        if unfolded_ids is False:
+            unfolded_ids = []
+
         active_article_accessible_ancestors = False
         if self and not has_root_access and not self.id in root_articles_ids:
             active_article_accessible_ancestors = self._get_accessible_root_ancestors()
@@ -3049,9 +4630,6 @@ class Article(models.Model):
         # favorite tree)
         root_articles_ids += favorite_articles_ids
 
-        if unfolded_ids is False:
-            unfolded_ids = []
-
         # Add active article and its parents in list of unfolded articles
         if self.is_article_visible:
             if self.parent_id:
@@ -3060,16 +4638,194 @@ class Article(models.Model):
         elif not self.parent_id and self.id:
             root_articles_ids += [self.id]
 
+        if roots_only:
+            root_articles = self.env['knowledge.article'].search(
+                [('id', 'in', root_articles_ids)],
+                order='sequence, id',
+            )
+            return {
+                "articles": root_articles.read(['name', 'icon', 'category', 'parent_id'], None),
+                "favorite_ids": favorite_articles_ids,
+                "active_article_accessible_root_id": active_article_accessible_ancestors[-1].id if active_article_accessible_ancestors else False
+            }
+
+        if change_token is not None:
+            new_change_token = self._get_sidebar_change_token()
+
         all_visible_articles = self.get_visible_articles(root_articles_ids, unfolded_ids)
 
-        return {
-            "articles": all_visible_articles.read(
+        if change_token is None:
+            articles_to_read = all_visible_articles
+        else:
+            known_ids = set(known_ids or [])
+            changed_ids = set()
+            known_articles = all_visible_articles.filtered(lambda article: article.id in known_ids).sudo()
+            if known_articles:
+                change_sequence = change_token - SIDEBAR_CHANGE_TOKEN_WINDOW
+                changed_ids = set(self.env['knowledge.article'].sudo().search([
+                    ('id', 'in', known_articles.ids),
+                    ('sidebar_change_sequence', '>', change_sequence),
+                ]).ids)
+                # the category and the permissions are inherited by the descendants
+                path_ids_by_article = {
+                    article: {int(article_id) for article_id in article.parent_path.split('/')[:-1]}
+                    for article in known_articles
+                }
+                tree_changed_ids = set(self.env['knowledge.article'].sudo().search([
+                    ('id', 'in', list(set().union(*path_ids_by_article.values()))),
+                    ('sidebar_tree_change_sequence', '>', change_sequence),
+                ]).ids)
+                changed_ids.update(
+                    article.id for article, path_ids in path_ids_by_article.items() if path_ids & tree_changed_ids)
+            articles_to_read = all_visible_articles.filtered(
+                lambda article: article.id not in known_ids or article.id in changed_ids)
+
+        result = {
+            "articles": articles_to_read.read(
                 ['name', 'icon', 'parent_id', 'category', 'is_locked', 'user_can_write', 'is_user_favorite', 'is_article_item', 'has_article_children'],
                 None,  # To not fetch the name of parent_id
             ),
             "favorite_ids": favorite_articles_ids,
             "active_article_accessible_root_id": active_article_accessible_ancestors[-1].id if active_article_accessible_ancestors else False
         }
+        if change_token is not None:
+            result.update({
+                "article_ids": all_visible_articles.ids,
+                "removed_ids": list(known_ids - set(all_visible_articles.ids)),
+                "change_token": new_change_token,
+            })
+        return result
+
+    @api.model
+    def _get_sidebar_fields(self):
+        """ Fields whose update changes how the articles are shown in the
+        sidebar (see ``get_sidebar_articles``). """
+        return {
+            'active', 'article_member_ids', 'icon', 'internal_permission', 'is_article_item',
+            'is_article_visible_by_everyone', 'is_desynchronized', 'is_locked', 'name',
+            'parent_id', 'to_delete',
+        }
+
+    @api.model
+    def _get_sidebar_change_token(self):
+        """ Return the greatest change sequence visible by the transaction.
+        The last value of the sequence is not used: it is not transactional and
+        may have been given to a change that is not committed yet. """
+        self.env.cr.execute("SELECT COALESCE(MAX(sidebar_change_sequence), 0) FROM knowledge_article")
+        return self.env.cr.fetchone()[0]
+
+    def _bump_sidebar_change_sequence(self, with_descendants=False):
+        """ Mark the articles as changed for the sidebar, so that they are
+        sent again to the clients synchronizing their sidebar incrementally.
+        The change sequence is bumped once for all the articles changed in the
+        transaction, right before the commit.
+
+        :param bool with_descendants: whether the descendants of the articles
+          changed as well (e.g. when changing the permissions of an article);
+        """
+        if not self:
+            return
+        changes = self.env.cr.precommit.data.get('knowledge.article.sidebar_changes')
+        if changes is None:
+            changes = self.env.cr.precommit.data['knowledge.article.sidebar_changes'] = {
+                'ids': set(),
+                'tree_ids': set(),
+            }
+            self.env.cr.precommit.add(self._flush_sidebar_change_sequence)
+        changes['tree_ids' if with_descendants else 'ids'].update(self.ids)
+
+    def _flush_sidebar_change_sequence(self):
+        changes = self.env.cr.precommit.data.pop('knowledge.article.sidebar_changes', None)
+        if not changes:
+            return
+        self.env.cr.execute("SELECT nextval('knowledge_article_sidebar_change_seq')")
+        change_sequence = self.env.cr.fetchone()[0]
+        if ids := list(changes['ids'] - changes['tree_ids']):
+            self.env.cr.execute(SQL(
+                "UPDATE knowledge_article SET sidebar_change_sequence = %s WHERE id = ANY(%s)",
+                change_sequence, ids,
+            ))
+        if changes['tree_ids']:
+            self.env.cr.execute(SQL(
+                """
+                UPDATE knowledge_article
+                   SET sidebar_change_sequence = %(sequence)s, sidebar_tree_change_sequence = %(sequence)s
+                 WHERE id = ANY(%(ids)s)
+                """,
+                sequence=change_sequence,
+                ids=list(changes['tree_ids']),
+            ))
+        self.env['knowledge.article'].invalidate_model(['sidebar_change_sequence', 'sidebar_tree_change_sequence'])
+
+    def _notify_sidebar_changes(self, moved=False, deleted=False):
+        """ Notify the sidebars showing the articles that they changed. The bus
+        sends the notifications when the transaction is committed.
+
+        :param bool moved: whether the articles were created, moved or
+          resequenced, in which case the sidebars reload their siblings;
+        :param bool deleted: whether the articles are being deleted;
+        """
+        for notification in self._get_sidebar_notifications(moved=moved, deleted=deleted):
+            self.env['bus.bus']._sendone(*notification)
+
+    def _get_sidebar_notifications(self, moved=False, deleted=False):
+        """ Return the bus notifications giving the new values of the articles
+        to the sidebars, on the channel of their root article (see
+        ``_build_bus_channel_list`` on ``ir.websocket``). The articles that
+        are restricted to some members are only sent to these members, so
+        that their names are not sent to users who cannot read them.
+        The articles desynchronized from their root (or under a desynchronized
+        article) may not be readable by all the members of the root: they are
+        sent on the channel of the root that only the internal users listen
+        to, and to their own external members.
+
+        :param bool moved: whether the articles were created, moved or
+          resequenced;
+        :param bool deleted: whether the articles are being deleted;
+        :return: list of (target, notification type, values) tuples
+        :rtype: list
+        """
+        articles = self.sudo().filtered(lambda article: not article.is_template)
+        if not articles:
+            return []
+        members_permissions = articles._get_article_member_permissions()
+        path_ids_by_article = {
+            article: [int(article_id) for article_id in article.parent_path.split('/')[1:-1]]
+            for article in articles
+        }
+        desynchronized_ids = set(articles.browse(
+            set().union(*path_ids_by_article.values())
+        ).with_context(active_test=False).filtered('is_desynchronized').ids)
+        notifications = []
+        for article in articles:
+            values = [{
+                'id': article.id,
+                'active': article.active and not deleted,
+                'category': article.category,
+                'icon': article.icon,
+                'is_article_item': article.is_article_item,
+                'moved': moved,
+                'name': article.name,
+                'parent_id': article.parent_id.id,
+                'write_uid': self.env.uid,
+            }]
+            member_permissions = members_permissions.get(article.id, {})
+            members = self.env['res.partner'].browse(
+                partner_id for partner_id, member in member_permissions.items()
+                if member['permission'] != 'none'
+            )
+            if article.inherited_permission == 'none' or len(members) != len(member_permissions):
+                notifications += [(partner, 'knowledge.article/sidebar_update', values) for partner in members]
+            elif desynchronized_ids.intersection(path_ids_by_article[article]):
+                notifications.append(
+                    ((article.root_article_id, 'sidebar_internal'), 'knowledge.article/sidebar_update', values))
+                notifications += [
+                    (partner, 'knowledge.article/sidebar_update', values)
+                    for partner in members.filtered('partner_share')
+                ]
+            else:
+                notifications.append(((article.root_article_id, 'sidebar'), 'knowledge.article/sidebar_update', values))
+        return notifications
 
     def get_article_hierarchy(self, exclude_article_ids=False):
         """ Return the `display_name` and `user_has_access` values of the articles that are in the
@@ -1,7 +1,14 @@
 # -*- coding: utf-8 -*-
 # Part of Odoo. See LICENSE file for full copyright and licensing details.
 
+import bisect
+
+from collections import Counter
+
 from odoo import api, exceptions, fields, models, _
+from odoo.tools import SQL
+
+FAVORITE_SEQUENCE_STEP = 100
 
 
 class ArticleFavorite(models.Model):
@@ -45,20 +52,149 @@ class ArticleFavorite(models.Model):
             if not vals.get('sequence'):
                 vals['sequence'] = default_sequence
                 default_sequence += 1
-        return super(ArticleFavorite, self).create(vals_list)
+        favorites = super(ArticleFavorite, self).create(vals_list)
+        favorites._update_article_favorite_count(1)
+        return favorites
 
     def write(self, vals):
         """ Whatever rights, avoid any attempt at privilege escalation. """
         if ('article_id' in vals or 'user_id' in vals) and not self.env.is_admin():
             raise exceptions.AccessError(_("Can not update the article or user of a favorite."))
-        return super().write(vals)
+        if 'article_id' not in vals:
+            return super().write(vals)
+        self._update_article_favorite_count(-1)
+        result = super().write(vals)
+        self._update_article_favorite_count(1)
+        return result
+
+    def unlink(self):
+        self._update_article_favorite_count(-1)
+        return super().unlink()
+
+    def _update_article_favorite_count(self, delta):
+        """ Add ``delta`` to the favorite count of the articles of the favorites.
+
+        The count is updated with an atomic increment rather than recomputed by
+        counting the favorites of the articles, so that toggling a favorite
+        does not read the favorites of the article and concurrent toggles do
+        not overwrite each other's count.
+
+        :param int delta: 1 when adding the favorites, -1 when removing them;
+        """
+        count_by_article_id = Counter(favorite.article_id.id for favorite in self)
+        if not count_by_article_id:
+            return
+        Article = self.env['knowledge.article']
+        Article.flush_model(['favorite_count'])
+        self.env.cr.execute(SQL(
+            """
+            UPDATE knowledge_article AS article
+               SET favorite_count = article.favorite_count + delta.count
+              FROM (VALUES %(values)s) AS delta(id, count)
+             WHERE article.id = delta.id
+            """,
+            values=SQL(', ').join(
+                SQL('(%s, %s)', article_id, count * delta)
+                for article_id, count in count_by_article_id.items()
+            ),
+        ))
+        Article.browse(count_by_article_id).invalidate_recordset(['favorite_count'])
 
     def resequence_favorites(self, article_ids):
-        # Some article may not be accessible by the user anymore. Therefore,
-        # to prevent an access error, one will only resequence the favorites
-        # related to the articles accessible by the user
-        sequence = 0
+        """ Reorder the favorites of the current user following the order of the
+        given articles.
+
+        Some article may not be accessible by the user anymore. Therefore, to
+        prevent an access error, one will only resequence the favorites related
+        to the articles accessible by the user, fetched by a single search.
+
+        The sequences are kept sparse: when a favorite is moved, only that one
+        gets a new sequence, taken between the sequences of its new neighbours
+        (see ``_get_sparse_sequences``). All the updated sequences are written
+        by a single statement. """
+        Favorite = self.env['knowledge.article.favorite']
+        Favorite.check_access('write')
+        favorites = Favorite.search([('article_id', 'in', article_ids), ('user_id', '=', self.env.uid)])
+        favorite_by_article_id = {favorite.article_id.id: favorite for favorite in favorites}
         # Keep the same order as in article_ids
-        for article_id in article_ids:
-            self.search([('article_id', '=', article_id), ('user_id', '=', self.env.uid)]).write({"sequence": sequence})
-            sequence += 1
+        ordered_favorites = [
+            favorite_by_article_id.pop(article_id)
+            for article_id in article_ids
+            if article_id in favorite_by_article_id
+        ]
+        sequences = self._get_sparse_sequences([favorite.sequence for favorite in ordered_favorites])
+        updated_sequences = [
+            (favorite.id, sequence)
+            for favorite, sequence in zip(ordered_favorites, sequences)
+            if favorite.sequence != sequence
+        ]
+        if not updated_sequences:
+            return
+
+        Favorite.flush_model(['sequence'])
+        self.env.cr.execute(SQL(
+            """
+            UPDATE knowledge_article_favorite AS favorite
+               SET sequence = new.sequence,
+                   write_uid = %(uid)s,
+                   write_date = (now() at time zone 'UTC')
+              FROM (VALUES %(values)s) AS new(id, sequence)
+             WHERE favorite.id = new.id
+            """,
+            uid=self.env.uid,
+            values=SQL(', ').join(SQL('(%s, %s)', favorite_id, sequence) for favorite_id, sequence in updated_sequences),
+        ))
+        Favorite.invalidate_model(['sequence', 'write_uid', 'write_date'])
+        self.env['knowledge.article'].invalidate_model(['user_favorite_sequence'])
+
+    @api.model
+    def _get_sparse_sequences(self, sequences):
+        """ Return new sequences, strictly increasing, for favorites currently
+        having the given sequences, changing as few of them as possible.
+
+        The favorites forming the longest strictly increasing run of sequences
+        keep their sequence, the other ones (typically the moved favorite) get a
+        sequence between the ones of their neighbours. When there is no room left
+        between the neighbours, all the favorites are renumbered with a step of
+        ``FAVORITE_SEQUENCE_STEP`` so that the next moves fit between them.
+
+        :param list sequences: current sequences, in the wanted order;
+        :return list: the new sequences, in the same order;
+        """
+        # longest strictly increasing subsequence (patience sorting)
+        tails, tail_indexes, previous_indexes = [], [], [None] * len(sequences)
+        for index, sequence in enumerate(sequences):
+            position = bisect.bisect_left(tails, sequence)
+            if position:
+                previous_indexes[index] = tail_indexes[position - 1]
+            if position == len(tails):
+                tails.append(sequence)
+                tail_indexes.append(index)
+            else:
+                tails[position] = sequence
+                tail_indexes[position] = index
+        kept_indexes = set()
+        index = tail_indexes[-1] if tail_indexes else None
+        while index is not None:
+            kept_indexes.add(index)
+            index = previous_indexes[index]
+
+        new_sequences = list(sequences)
+        lower, moved_indexes = 0, []
+        for index in range(len(sequences) + 1):
+            if index < len(sequences) and index not in kept_indexes:
+                moved_indexes.append(index)
+                continue
+            if moved_indexes:
+                if index < len(sequences):
+                    upper = sequences[index]
+                else:
+                    upper = lower + FAVORITE_SEQUENCE_STEP * (len(moved_indexes) + 1)
+                if upper - lower <= len(moved_indexes):
+                    return [FAVORITE_SEQUENCE_STEP * (rank + 1) for rank in range(len(sequences))]
+                for rank, moved_index in enumerate(moved_indexes, start=1):
+                    new_sequences[moved_index] = lower + (upper - lower) * rank // (len(moved_indexes) + 1)
+                moved_indexes = []
+            if index < len(sequences):
+                lower = sequences[index]
+        return new_sequences
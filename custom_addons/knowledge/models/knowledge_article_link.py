@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+# Part of Odoo. See LICENSE file for full copyright and licensing details.
+
+from odoo import fields, models
+
+
+class ArticleLink(models.Model):
+    """ References to other articles made in the body of the articles: links
+    to articles and embedded views of article items. They are kept up to date
+    when the bodies are written (see ``knowledge.article._update_article_links``)
+    so that the backlinks of an article, the broken links (whose target has
+    been deleted) and the references to update when copying an article can be
+    found without parsing the bodies. """
+    _name = 'knowledge.article.link'
+    _description = 'Article Link'
+    _log_access = False
+
+    source_article_id = fields.Many2one(
+        'knowledge.article', string='Source Article',
+        index=True, required=True, ondelete='cascade')
+    target_article_id = fields.Many2one(
+        'knowledge.article', string='Target Article',
+        index=True, ondelete='set null',
+        help='Referenced article, empty when the article has been deleted.')
+    target_res_id = fields.Integer(string='Target Article ID', required=True)
+    kind = fields.Selection(
+        [('link', 'Link'), ('embedded_view', 'Embedded View')],
+        string='Kind', required=True)
+
+    _sql_constraints = [
+        ('unique_source_target_kind',
+         'unique(source_article_id, target_res_id, kind)',
+         'An article can reference another article only once per kind.')
+    ]
@@ -76,11 +76,24 @@ class ArticleMember(models.Model):
                       article.display_name)
                 )
 
+    @api.model_create_multi
+    def create(self, vals_list):
+        members = super().create(vals_list)
+        # permissions are inherited: the sidebar of the descendants changes too
+        members.article_id._bump_sidebar_change_sequence(with_descendants=True)
+        return members
+
     def write(self, vals):
         """ Whatever rights, avoid any attempt at privilege escalation. """
         if ('article_id' in vals or 'partner_id' in vals) and not self.env.is_admin():
             raise AccessError(_("Can not update the article or partner of a member."))
-        return super().write(vals)
+        result = super().write(vals)
+        self.article_id._bump_sidebar_change_sequence(with_descendants=True)
+        return result
+
+    def unlink(self):
+        self.article_id._bump_sidebar_change_sequence(with_descendants=True)
+        return super().unlink()
 
     @api.ondelete(at_uninstall=False)
     def _unlink_except_no_writer(self):
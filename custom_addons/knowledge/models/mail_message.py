@@ -0,0 +1,23 @@
+# -*- coding: utf-8 -*-
+# Part of Odoo. See LICENSE file for full copyright and licensing details.
+
+from odoo import models
+from odoo.tools.sql import create_index, make_index_name
+
+
+class MailMessage(models.Model):
+    _inherit = 'mail.message'
+
+    def init(self):
+        """ Index the comments of the articles for the extended search (see
+        ``get_user_sorted_articles_extended`` on ``knowledge.article``). The
+        'knowledge_config' text search configuration is created by the articles,
+        which are initialized first. """
+        super().init()
+        create_index(
+            self.env.cr,
+            make_index_name(self._table, 'knowledge_thread_body'),
+            self._table,
+            ["to_tsvector('knowledge_config', body)"],
+            method='GIN',
+            where="model = 'knowledge.article.thread'")
@@ -14,6 +14,12 @@ class Users(models.Model):
             users.filtered(lambda user: not user.partner_share)._generate_tutorial_articles()
         return users
 
+    def unlink(self):
+        """ Remove the favorites through the ORM rather than through the SQL
+        cascade, so that the favorite count of their articles is updated. """
+        self.env['knowledge.article.favorite'].sudo().search([('user_id', 'in', self.ids)]).unlink()
+        return super().unlink()
+
     def _generate_tutorial_articles(self):
         articles_to_create = []
         for user in self:
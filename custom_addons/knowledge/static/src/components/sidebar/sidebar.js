@@ -18,7 +18,7 @@ import { useNestedSortable } from "@web/core/utils/nested_sortable";
 import { useService } from "@web/core/utils/hooks";
 import { useRecordObserver } from "@web/model/relational_model/utils";
 
-import { Component, onWillStart, reactive, useRef, useState, useChildSubEnv } from "@odoo/owl";
+import { Component, onWillStart, onWillUnmount, reactive, useRef, useState, useChildSubEnv } from "@odoo/owl";
 
 export const SORTABLE_TOLERANCE = 10;
 
@@ -54,6 +54,7 @@ export class KnowledgeSidebar extends Component {
         super.setup();
 
         this.actionService = useService("action");
+        this.busService = useService("bus_service");
         this.dialog = useService("dialog");
         this.orm = useService("orm");
 
@@ -91,6 +92,23 @@ export class KnowledgeSidebar extends Component {
             sidebarSize: localStorage.getItem(this.storageKeys.size) || 300,
         });
 
+        // Articles already fetched by `loadArticles`, kept between the loads
+        // to only fetch the articles that changed since the last load.
+        this.sidebarCache = {
+            changeToken: 0,
+            articles: {},
+        };
+
+        // Listen to the changes done by other users on the articles under the
+        // root articles shown in the sidebar
+        this.busChannels = new Set();
+        this.onSidebarUpdate = this.onSidebarUpdate.bind(this);
+        this.busService.subscribe("knowledge.article/sidebar_update", this.onSidebarUpdate);
+        onWillUnmount(() => {
+            this.busService.unsubscribe("knowledge.article/sidebar_update", this.onSidebarUpdate);
+            this.busChannels.forEach((channel) => this.busService.deleteChannel(channel));
+        });
+
         this.loadArticles();
 
         // Resequencing of the favorite articles
@@ -495,6 +513,9 @@ export class KnowledgeSidebar extends Component {
      * child_ids arrays because a simple read of the child_ids field would
      * return items (which should not be included in the sidebar), and the
      * articles would not be sorted correctly.
+     * The sidebar is synchronized incrementally: only the articles that are
+     * new or that changed since the last load are fetched, the other ones are
+     * taken from the cache.
      */
     async loadArticles() {
         this.state.loading = true;
@@ -510,12 +531,26 @@ export class KnowledgeSidebar extends Component {
             this.props.record.resModel,
             "get_sidebar_articles",
             [this.props.record.resId],
-            { unfolded_ids: [...this.unfoldedArticlesIds, ...this.unfoldedFavoritesIds] }
+            {
+                unfolded_ids: [...this.unfoldedArticlesIds, ...this.unfoldedFavoritesIds],
+                change_token: this.sidebarCache.changeToken,
+                known_ids: Object.keys(this.sidebarCache.articles).map(Number),
+            }
         );
-        const children = {};
+        for (const articleId of res.removed_ids) {
+            delete this.sidebarCache.articles[articleId];
+        }
         for (const article of res.articles) {
+            this.sidebarCache.articles[article.id] = article;
+        }
+        this.sidebarCache.changeToken = res.change_token;
+        const children = {};
+        for (const articleId of res.article_ids) {
+            const article = this.sidebarCache.articles[articleId];
             this.state.articles[article.id] = {
                 ...article,
+                // Favorites are not tracked by the change token
+                is_user_favorite: res.favorite_ids.includes(article.id),
                 child_ids: children[article.id] ? children[article.id] : [],
             };
             // Items could be shown in the favorite tree as root articles, but
@@ -549,23 +584,21 @@ export class KnowledgeSidebar extends Component {
         this.showArticle(this.getArticle(this.props.record.resId));
         this.state.loading = false;
         this.resetUnfoldedArticles();
+        this.updateBusChannels();
     }
 
     /**
-     * Load the children of a given article
-     * @param {object} article
+     * Load the children of the given articles, in a single call
+     * @param {object[]} articles
      */
-    async loadChildren(article) {
-        const children = await this.orm.searchRead(
+    async loadChildren(articles) {
+        const children = await this.orm.call(
             this.props.record.resModel,
-            [['parent_id', '=', article.id], ['is_article_item', '=', false]],
-            ['name', 'icon', 'is_locked', 'user_can_write', 'has_article_children'],
-            {
-                'load': 'None',
-                'order': 'sequence, id',
-            }
+            "get_sidebar_children",
+            [articles.map((article) => article.id)]
         );
         for (const child of children) {
+            const article = this.getArticle(child.parent_id);
             article.child_ids.push(child.id);
             if (this.getArticle(child.id)) {
                 // Article was already loaded (if it is in the favorites)
@@ -573,7 +606,6 @@ export class KnowledgeSidebar extends Component {
             }
             this.state.articles[child.id] = {
                 ...child,
-                parent_id: article.id,
                 child_ids: [],
                 category: article.category,
                 is_article_item: false,
@@ -707,6 +739,62 @@ export class KnowledgeSidebar extends Component {
         }
     }
 
+    /**
+     * Patch the sidebar with the changes done by other users on the articles,
+     * as received on the bus channels of the root articles. The names and
+     * icons are updated in place, while the siblings of the moved and created
+     * articles are reloaded to show them at the right position.
+     * @param {Object[]} articles - new values of the changed articles
+     */
+    async onSidebarUpdate(articles) {
+        if (this.state.loading) {
+            return;
+        }
+        const parentsToReload = new Set();
+        let reloadRoots = false;
+        for (const values of articles) {
+            if (values.write_uid === user.userId || values.is_article_item) {
+                // Own changes are already shown, items are not shown in the trees
+                continue;
+            }
+            const article = this.getArticle(values.id);
+            if (!values.active) {
+                if (article && !this.isAncestor(article.id)) {
+                    this.removeArticle(article);
+                    this.removeFavorite(article);
+                }
+                continue;
+            }
+            if (article) {
+                Object.assign(article, { name: values.name, icon: values.icon });
+                if (!values.moved && article.category === values.category) {
+                    continue;
+                }
+                this.removeArticle(article);
+                Object.assign(article, { parent_id: values.parent_id, category: values.category });
+            }
+            if (!values.parent_id) {
+                reloadRoots = true;
+                continue;
+            }
+            const parent = this.getArticle(values.parent_id);
+            if (parent) {
+                parent.has_article_children = true;
+                if (parent.child_ids.length) {
+                    parentsToReload.add(parent);
+                }
+            }
+        }
+        if (reloadRoots) {
+            await this.loadArticles();
+        } else if (parentsToReload.size) {
+            for (const parent of parentsToReload) {
+                parent.child_ids = [];
+            }
+            await this.loadChildren([...parentsToReload]);
+        }
+    }
+
     /**
      * Open the command palette if the user is an internal user, and open the
      * article selection dialog if the user is a portal user
@@ -857,6 +945,28 @@ export class KnowledgeSidebar extends Component {
         });
     }
 
+    /**
+     * Listen to the bus channels of the root articles shown in the sidebar.
+     */
+    updateBusChannels() {
+        const channels = new Set(
+            [...this.state.workspaceIds, ...this.state.sharedIds, ...this.state.privateIds].map(
+                (articleId) => `knowledge_article_sidebar_${articleId}`
+            )
+        );
+        for (const channel of this.busChannels) {
+            if (!channels.has(channel)) {
+                this.busService.deleteChannel(channel);
+            }
+        }
+        for (const channel of channels) {
+            if (!this.busChannels.has(channel)) {
+                this.busService.addChannel(channel);
+            }
+        }
+        this.busChannels = channels;
+    }
+
     /**
      * Resize the sidebar horizontally.
      */
@@ -888,11 +998,13 @@ export class KnowledgeSidebar extends Component {
      * @param {object} article - article to show in the sidebar
      */
     showArticle(article) {
+        const ancestorIds = [];
         while (article && article.parent_id && article.parent_id in this.state.articles) {
-            // Unfold in the main tree, without loading the children
-            this.unfold(article.parent_id, false);
+            ancestorIds.push(article.parent_id);
             article = this.getArticle(article.parent_id);
         }
+        // Unfold in the main tree
+        this.unfoldMany(ancestorIds, false);
     }
 
     /** Unfold an article.
@@ -900,15 +1012,24 @@ export class KnowledgeSidebar extends Component {
      * @param {boolean} isFavorite: whether to unfold in favorite tree
      */        
     async unfold(articleId, isFavorite) {
-        const article = this.getArticle(articleId);
-        // Load the children of the article if it has not been unfolded yet
-        if (article.has_article_children && !article.child_ids.length) {
-            await this.loadChildren(article);
+        await this.unfoldMany([articleId], isFavorite);
+    }
+
+    /** Unfold several articles, loading their children in a single call.
+     * @param {integer[]} articleIds: ids of articles
+     * @param {boolean} isFavorite: whether to unfold in favorite tree
+     */
+    async unfoldMany(articleIds, isFavorite) {
+        // Load the children of the articles that have not been unfolded yet
+        const articlesToLoad = articleIds
+            .map((articleId) => this.getArticle(articleId))
+            .filter((article) => article.has_article_children && !article.child_ids.length);
+        if (articlesToLoad.length) {
+            await this.loadChildren(articlesToLoad);
         }
-        if (isFavorite) {
-            this.unfoldedFavoritesIds.add(articleId);
-        } else {
-            this.unfoldedArticlesIds.add(articleId);
+        const unfoldedIds = isFavorite ? this.unfoldedFavoritesIds : this.unfoldedArticlesIds;
+        for (const articleId of articleIds) {
+            unfoldedIds.add(articleId);
         }
     }
 }
@@ -4,14 +4,25 @@ import { KnowledgeSidebarRow } from "./sidebar_row";
 import { user } from "@web/core/user";
 import { useService } from "@web/core/utils/hooks";
 
-import { Component, onWillStart, useChildSubEnv } from "@odoo/owl";
+import { Component, onWillStart, useChildSubEnv, useEffect, useRef, useState } from "@odoo/owl";
 
 /**
  * This file defines the different sections used in the sidebar.
  * Each section is responsible of displaying an array of root articles and
  * their children.
+ * To keep the sidebar fast with thousands of root articles, the root articles
+ * are rendered by pages, and at most SECTION_RENDERED_PAGES pages are rendered
+ * at once: scrolling to either end of the rendered pages renders the next
+ * (or previous) page and unmounts the one at the other end. Unmounted pages are
+ * replaced by spacers of their last measured height to keep the scroll
+ * position.
  */
 
+export const SECTION_PAGE_SIZE = 100;
+export const SECTION_RENDERED_PAGES = 3;
+// Estimated height of a root row, for the pages that were never rendered
+const SECTION_ROW_HEIGHT = 28;
+
 export class KnowledgeSidebarSection extends Component {
     static template = "";
     static props = {
@@ -25,9 +36,137 @@ export class KnowledgeSidebarSection extends Component {
 
     setup() {
         super.setup();
+        // Rendered root articles: props.rootIds[start, end)
+        this.state = useState({ start: 0, end: SECTION_PAGE_SIZE });
+        // Height of the pages when they were last rendered, by page index
+        this.pageHeights = [];
+        this.tree = useRef("tree");
+        this.topSentinel = useRef("topSentinel");
+        this.bottomSentinel = useRef("bottomSentinel");
         onWillStart(async () => {
             this.isInternalUser = await user.hasGroup('base.group_user');
         });
+        useEffect(
+            (topSentinel, bottomSentinel) => {
+                const observer = new IntersectionObserver((entries) => {
+                    for (const entry of entries) {
+                        if (!entry.isIntersecting) {
+                            continue;
+                        }
+                        if (entry.target === topSentinel) {
+                            this.renderPreviousPage();
+                        } else {
+                            this.renderNextPage();
+                        }
+                    }
+                });
+                for (const sentinel of [topSentinel, bottomSentinel]) {
+                    if (sentinel) {
+                        observer.observe(sentinel);
+                    }
+                }
+                return () => observer.disconnect();
+            },
+            () => [this.topSentinel.el, this.bottomSentinel.el]
+        );
+        // Move the rendered pages to the root of the active article when it
+        // is not rendered
+        useEffect(
+            (activeRootIndex) => {
+                if (
+                    activeRootIndex !== -1 &&
+                    (activeRootIndex < this.state.start || activeRootIndex >= this.state.end)
+                ) {
+                    this.measurePages(this.state.start, this.state.end);
+                    this.state.start =
+                        Math.floor(activeRootIndex / SECTION_PAGE_SIZE) * SECTION_PAGE_SIZE;
+                    this.state.end = this.state.start + SECTION_PAGE_SIZE;
+                }
+            },
+            () => [this.activeRootIndex]
+        );
+    }
+
+    /**
+     * Index of the root of the active article in the root articles.
+     * @returns {number} -1 if the active article is not in this section
+     */
+    get activeRootIndex() {
+        let article = this.env.getArticle(this.props.record.resId);
+        while (article && article.parent_id && this.env.getArticle(article.parent_id)) {
+            article = this.env.getArticle(article.parent_id);
+        }
+        return article ? this.props.rootIds.indexOf(article.id) : -1;
+    }
+
+    /**
+     * @returns {Array} ids of the root articles to render
+     */
+    get renderedRootIds() {
+        return this.props.rootIds.slice(this.state.start, this.state.end);
+    }
+
+    /**
+     * Height of the spacers replacing the pages rendered before and after
+     * the rendered ones.
+     * @returns {{top: number, bottom: number}}
+     */
+    get spacerHeights() {
+        const pageCount = Math.ceil(this.props.rootIds.length / SECTION_PAGE_SIZE);
+        const startPage = this.state.start / SECTION_PAGE_SIZE;
+        const endPage = Math.min(this.state.end / SECTION_PAGE_SIZE, pageCount);
+        let top = 0;
+        for (let page = 0; page < startPage; page++) {
+            top += this.pageHeights[page] ?? SECTION_PAGE_SIZE * SECTION_ROW_HEIGHT;
+        }
+        // Only the pages already rendered once are known below, the next ones
+        // are rendered when scrolling down to them
+        let bottom = 0;
+        for (let page = endPage; page < pageCount && this.pageHeights[page]; page++) {
+            bottom += this.pageHeights[page];
+        }
+        return { top, bottom };
+    }
+
+    /**
+     * Store the height of the rendered pages within the given range of root
+     * articles.
+     * @param {number} start
+     * @param {number} end
+     */
+    measurePages(start, end) {
+        const rows = this.tree.el?.children || [];
+        for (let index = start; index < end; index += SECTION_PAGE_SIZE) {
+            const first = rows[index - this.state.start];
+            const last = rows[Math.min(index + SECTION_PAGE_SIZE, this.state.end) - this.state.start - 1]
+                || rows[rows.length - 1];
+            if (first && last) {
+                this.pageHeights[index / SECTION_PAGE_SIZE] =
+                    last.getBoundingClientRect().bottom - first.getBoundingClientRect().top;
+            }
+        }
+    }
+
+    renderNextPage() {
+        if (this.state.end >= this.props.rootIds.length) {
+            return;
+        }
+        if (this.state.end - this.state.start >= SECTION_RENDERED_PAGES * SECTION_PAGE_SIZE) {
+            this.measurePages(this.state.start, this.state.start + SECTION_PAGE_SIZE);
+            this.state.start += SECTION_PAGE_SIZE;
+        }
+        this.state.end += SECTION_PAGE_SIZE;
+    }
+
+    renderPreviousPage() {
+        if (this.state.start <= 0) {
+            return;
+        }
+        if (this.state.end - this.state.start >= SECTION_RENDERED_PAGES * SECTION_PAGE_SIZE) {
+            this.measurePages(this.state.end - SECTION_PAGE_SIZE, this.state.end);
+            this.state.end -= SECTION_PAGE_SIZE;
+        }
+        this.state.start -= SECTION_PAGE_SIZE;
     }
 }
 
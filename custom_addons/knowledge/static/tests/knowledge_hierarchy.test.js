@@ -102,9 +102,13 @@ defineMailModels();
 defineModels([Article]);
 
 onRpc("get_sidebar_articles", function () {
+    const articles = this.env["article"]._filter();
     return {
-        articles: this.env["article"]._filter(),
+        articles,
+        article_ids: articles.map((article) => article.id),
+        removed_ids: [],
         favorite_ids: [],
+        change_token: 0,
     };
 });
 
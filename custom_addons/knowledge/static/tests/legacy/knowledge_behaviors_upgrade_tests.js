@@ -93,7 +93,7 @@ function beforeEach() {
                 records: [record],
                 methods: {
                     get_sidebar_articles() {
-                        return {articles: [], favorite_ids: []};
+                        return {articles: [], article_ids: [], removed_ids: [], favorite_ids: [], change_token: 0};
                     }
                 }
             }
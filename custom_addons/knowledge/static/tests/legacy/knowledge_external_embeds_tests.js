@@ -169,7 +169,7 @@ QUnit.module("Knowledge External Embeds Tests", (hooks) => {
                 if (model === "knowledge_article") {
                     switch (method) {
                         case "get_sidebar_articles":
-                            return {articles: [], favorite_ids: []};
+                            return {articles: [], article_ids: [], removed_ids: [], favorite_ids: [], change_token: 0};
                     }
                 }
             }
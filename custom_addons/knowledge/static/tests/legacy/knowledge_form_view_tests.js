@@ -93,7 +93,7 @@ QUnit.module("Knowledge - Articles Structure Command", (hooks) => {
                     }],
                     methods: {
                         get_sidebar_articles() {
-                            return {articles: [], favorite_ids: []};
+                            return {articles: [], article_ids: [], removed_ids: [], favorite_ids: [], change_token: 0};
                         }
                     }
                 }
@@ -224,7 +224,7 @@ QUnit.module("Knowledge - External View Insertion", (hooks) => {
                     }],
                     methods: {
                         get_sidebar_articles() {
-                            return {articles: [], favorite_ids: []};
+                            return {articles: [], article_ids: [], removed_ids: [], favorite_ids: [], change_token: 0};
                         }
                     }
                 }
@@ -462,7 +462,7 @@ QUnit.module("Knowledge - Ensure body save scenarios", (hooks) => {
                     records: [record],
                     methods: {
                         get_sidebar_articles() {
-                            return {articles: [], favorite_ids: []};
+                            return {articles: [], article_ids: [], removed_ids: [], favorite_ids: [], change_token: 0};
                         }
                     }
                 }
@@ -785,7 +785,7 @@ QUnit.module("Knowledge Table of Content", (hooks) => {
                     }],
                     methods: {
                         get_sidebar_articles() {
-                            return {articles: [], favorite_ids: []};
+                            return {articles: [], article_ids: [], removed_ids: [], favorite_ids: [], change_token: 0};
                         }
                     },
                 },
@@ -916,7 +916,7 @@ QUnit.module("Knowledge - Silenced Failure Cases (Recoverable)", (hooks) => {
                     records: [record],
                     methods: {
                         get_sidebar_articles() {
-                            return {articles: [], favorite_ids: []};
+                            return {articles: [], article_ids: [], removed_ids: [], favorite_ids: [], change_token: 0};
                         }
                     }
                 }
@@ -12,6 +12,7 @@ from . import test_knowledge_article_template
 from . import test_knowledge_article_thread
 from . import test_knowledge_article_thread_controller
 from . import test_knowledge_article_thread_permissions
+from . import test_knowledge_benchmark
 from . import test_knowledge_editor_commands
 from . import test_knowledge_form_ui
 from . import test_knowledge_performance
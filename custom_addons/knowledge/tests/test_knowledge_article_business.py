@@ -174,6 +174,264 @@ class TestKnowledgeArticleBusiness(KnowledgeCommonBusinessCase):
         self.assertListEqual(sidebar_articles['favorite_ids'], [playground_root.id])
         self.assertListEqual([article['id'] for article in sidebar_articles['articles']], (playground_children + playground_root).ids)
 
+    @users('employee')
+    def test_article_get_sidebar_articles_roots_only(self):
+        """ Testing the compact payload of the collapsed sidebar. """
+        playground_root = self.article_workspace.with_env(self.env)
+        playground_children = self.workspace_children.with_env(self.env)
+        shared_root = self.article_shared.with_env(self.env)
+        playground_children[1].action_toggle_favorite()
+
+        sidebar_articles = playground_children[0].get_sidebar_articles(playground_root.ids, roots_only=True)
+        self.assertListEqual(sidebar_articles['favorite_ids'], playground_children[1].ids)
+        self.assertCountEqual(
+            [article['id'] for article in sidebar_articles['articles']],
+            (playground_root + shared_root + playground_children[1]).ids,
+            'Should only return the roots and the favorites, not the unfolded articles')
+        self.assertEqual(
+            set(sidebar_articles['articles'][0]),
+            {'id', 'name', 'icon', 'category', 'parent_id'})
+
+    @users('employee')
+    def test_article_get_sidebar_articles_roots_only_hidden_root(self):
+        """ Testing that the collapsed sidebar shows the current article when
+        it is a hidden root article. """
+        hidden_root = self.env['knowledge.article'].sudo().create({
+            'internal_permission': 'write',
+            'name': 'Hidden Root',
+        }).with_env(self.env)
+        self.assertTrue(hidden_root.user_has_access)
+        self.assertFalse(hidden_root.is_article_visible)
+
+        sidebar_articles = hidden_root.get_sidebar_articles(roots_only=True)
+        self.assertIn(hidden_root.id, [article['id'] for article in sidebar_articles['articles']])
+        sidebar_articles = self.env['knowledge.article'].get_sidebar_articles(roots_only=True)
+        self.assertNotIn(hidden_root.id, [article['id'] for article in sidebar_articles['articles']])
+
+    @users('employee')
+    def test_article_get_sidebar_articles_inaccessible_root(self):
+        """ Testing the sidebar of an article whose root is not accessible. """
+        private_root = self.env['knowledge.article'].sudo().create({
+            'article_member_ids': [(0, 0, {'partner_id': self.partner_admin.id, 'permission': 'write'})],
+            'internal_permission': 'none',
+            'name': 'Private Root',
+        })
+        desynchronized_child = self.env['knowledge.article'].sudo().create({
+            'internal_permission': 'write',
+            'is_desynchronized': True,
+            'name': 'Desynchronized Child',
+            'parent_id': private_root.id,
+        })
+        grand_child = self.env['knowledge.article'].sudo().create({
+            'name': 'Grand Child',
+            'parent_id': desynchronized_child.id,
+        }).with_env(self.env)
+
+        self.assertEqual(grand_child._get_accessible_root_ancestors(), grand_child + desynchronized_child)
+        sidebar_articles = grand_child.get_sidebar_articles()
+        self.assertEqual(sidebar_articles['active_article_accessible_root_id'], desynchronized_child.id)
+        self.assertIn(grand_child.id, [article['id'] for article in sidebar_articles['articles']])
+
+        # the collapsed sidebar shows the accessible root instead
+        sidebar_articles = grand_child.get_sidebar_articles(roots_only=True)
+        self.assertEqual(sidebar_articles['active_article_accessible_root_id'], desynchronized_child.id)
+        article_ids = [article['id'] for article in sidebar_articles['articles']]
+        self.assertIn(desynchronized_child.id, article_ids)
+        self.assertNotIn(private_root.id, article_ids)
+        self.assertNotIn(grand_child.id, article_ids, 'Should not return the unfolded articles')
+
+    @users('employee')
+    def test_article_get_sidebar_notifications(self):
+        """ Testing the notifications sent to the sidebars when articles change. """
+        playground_child = self.workspace_children[0].with_env(self.env)
+        private_article = self.env['knowledge.article'].article_create(title='Private', is_private=True)
+
+        playground_child.name = 'Renamed'
+        [(target, notification_type, values)] = playground_child._get_sidebar_notifications()
+        self.assertEqual(target, (self.article_workspace, 'sidebar'),
+                         'Should notify the sidebars showing the root article')
+        self.assertEqual(notification_type, 'knowledge.article/sidebar_update')
+        self.assertEqual(values, [{
+            'id': playground_child.id,
+            'active': True,
+            'category': 'workspace',
+            'icon': playground_child.icon,
+            'is_article_item': False,
+            'moved': False,
+            'name': 'Renamed',
+            'parent_id': self.article_workspace.id,
+            'write_uid': self.env.uid,
+        }])
+
+        [(target, _notification_type, values)] = private_article._get_sidebar_notifications(deleted=True)
+        self.assertEqual(target, self.partner_employee,
+                         'Should only notify the members of the restricted articles')
+        self.assertFalse(values[0]['active'])
+
+        # the external members of the root cannot read the desynchronized articles
+        shared_root = self.env['knowledge.article'].sudo().create({
+            'article_member_ids': [(0, 0, {'partner_id': self.partner_portal.id, 'permission': 'read'})],
+            'internal_permission': 'write',
+            'name': 'Shared Root',
+        })
+        desynchronized_child = self.env['knowledge.article'].sudo().create({
+            'article_member_ids': [(0, 0, {'partner_id': self.customer.id, 'permission': 'read'})],
+            'internal_permission': 'write',
+            'is_desynchronized': True,
+            'name': 'Desynchronized Child',
+            'parent_id': shared_root.id,
+        })
+        grand_child = self.env['knowledge.article'].sudo().create({
+            'name': 'Grand Child',
+            'parent_id': desynchronized_child.id,
+        })
+        for article in desynchronized_child + grand_child:
+            notifications = article.with_env(self.env)._get_sidebar_notifications()
+            self.assertCountEqual(
+                [target for target, _notification_type, _values in notifications],
+                [(shared_root, 'sidebar_internal'), self.customer],
+                'Should notify the internal users and the external members of the article, not the ones of the root')
+
+    @users('employee')
+    def test_article_sidebar_notifications_bus(self):
+        """ Testing the notifications sent on the bus when articles are created,
+        moved and deleted. """
+        playground_root = self.article_workspace.with_env(self.env)
+        playground_child = self.workspace_children[0].with_env(self.env)
+        sent_notifications = []
+
+        def _sendone(bus, target, notification_type, message):
+            sent_notifications.append((target, notification_type, [
+                (values['id'], values['parent_id'], values['moved'], values['active']) for values in message
+            ]))
+
+        with patch.object(type(self.env['bus.bus']), '_sendone', _sendone):
+            article = self.env['knowledge.article'].create({'name': 'New', 'parent_id': playground_root.id})
+            self.assertIn(
+                ((playground_root, 'sidebar'), 'knowledge.article/sidebar_update',
+                 [(article.id, playground_root.id, True, True)]),
+                sent_notifications)
+
+            sent_notifications.clear()
+            article.parent_id = playground_child
+            self.assertIn(
+                ((playground_root, 'sidebar'), 'knowledge.article/sidebar_update',
+                 [(article.id, playground_child.id, True, True)]),
+                sent_notifications)
+
+            sent_notifications.clear()
+            article.unlink()
+            self.assertEqual(sent_notifications, [
+                ((playground_root, 'sidebar'), 'knowledge.article/sidebar_update',
+                 [(article.id, playground_child.id, False, False)]),
+            ])
+
+    @users('employee')
+    def test_article_get_sidebar_children(self):
+        """ Testing the batched loading of the children for the sidebar. """
+        playground_root = self.article_workspace.with_env(self.env)
+        playground_children = self.workspace_children.with_env(self.env)
+        grand_child, _item = self.env['knowledge.article'].create([
+            {'name': 'Grand Child', 'parent_id': playground_children[0].id},
+            {'name': 'Item', 'parent_id': playground_children[0].id, 'is_article_item': True},
+        ])
+
+        children = self.env['knowledge.article'].get_sidebar_children((playground_root + playground_children).ids)
+        self.assertCountEqual(
+            [(child['id'], child['parent_id'], child['has_article_children']) for child in children],
+            [(playground_children[0].id, playground_root.id, True),
+             (playground_children[1].id, playground_root.id, False),
+             (grand_child.id, playground_children[0].id, False)],
+            'Should return the children of all the given articles, without the items')
+
+    @users('employee')
+    @patch('odoo.addons.knowledge.models.knowledge_article.SIDEBAR_CHANGE_TOKEN_WINDOW', 0)
+    def test_article_get_sidebar_articles_incremental(self):
+        """ Testing the incremental synchronization of the sidebar. """
+        Article = self.env['knowledge.article']
+        playground_root = self.article_workspace.with_env(self.env)
+        playground_children = self.workspace_children.with_env(self.env)
+        shared_root = self.article_shared.with_env(self.env)
+
+        # first synchronization: all the articles are sent
+        sidebar_articles = Article.get_sidebar_articles(playground_root.ids, change_token=0)
+        all_ids = (playground_children + shared_root + playground_root).ids
+        self.assertCountEqual([article['id'] for article in sidebar_articles['articles']], all_ids)
+        self.assertListEqual(sidebar_articles['removed_ids'], [])
+        change_token = sidebar_articles['change_token']
+
+        # nothing changed: only the ordered ids are sent
+        sidebar_articles = Article.get_sidebar_articles(playground_root.ids, change_token=change_token, known_ids=all_ids)
+        self.assertListEqual(sidebar_articles['articles'], [])
+        self.assertCountEqual(sidebar_articles['article_ids'], all_ids)
+        self.assertListEqual(sidebar_articles['removed_ids'], [])
+
+        # renamed, moved and removed articles
+        playground_children[0].name = 'Renamed'
+        playground_children[1].action_archive()
+        self.env.cr.precommit.run()
+        sidebar_articles = Article.get_sidebar_articles(playground_root.ids, change_token=change_token, known_ids=all_ids)
+        self.assertCountEqual(
+            [(article['id'], article['name']) for article in sidebar_articles['articles']],
+            [(playground_children[0].id, 'Renamed'), (playground_root.id, playground_root.name)],
+            'Should send the renamed article and the parent which may have lost its last child')
+        self.assertListEqual(sidebar_articles['removed_ids'], playground_children[1].ids)
+        self.assertGreater(sidebar_articles['change_token'], change_token)
+
+        # permission changes are propagated to the descendants
+        change_token = sidebar_articles['change_token']
+        known_ids = sidebar_articles['article_ids']
+        renamed_sequence = playground_children[0].sidebar_change_sequence
+        playground_root.sudo()._add_members(self.partner_employee2, 'write')
+        self.env.cr.precommit.run()
+        sidebar_articles = Article.get_sidebar_articles(playground_root.ids, change_token=change_token, known_ids=known_ids)
+        self.assertCountEqual(
+            [article['id'] for article in sidebar_articles['articles']],
+            (playground_root + playground_children[0]).ids)
+
+        self.assertEqual(playground_children[0].sidebar_change_sequence, renamed_sequence,
+                         'Should not write on the descendants of the article')
+
+        # a change committed after a change that took a greater value of the
+        # sequence is sent again by the next synchronizations
+        self.env.cr.execute("SELECT nextval('knowledge_article_sidebar_change_seq')")
+        late_sequence = self.env.cr.fetchone()[0]
+        playground_root.name = 'Renamed Root'
+        self.env.cr.precommit.run()
+        sidebar_articles = Article.get_sidebar_articles(playground_root.ids, change_token=change_token, known_ids=known_ids)
+        change_token = sidebar_articles['change_token']
+        self.env.cr.execute(
+            "UPDATE knowledge_article SET sidebar_change_sequence = %s WHERE id = %s",
+            [late_sequence, playground_children[0].id])
+        self.env.invalidate_all()
+        sidebar_articles = Article.get_sidebar_articles(playground_root.ids, change_token=change_token, known_ids=known_ids)
+        self.assertEqual([article['id'] for article in sidebar_articles['articles']], [])
+        with patch('odoo.addons.knowledge.models.knowledge_article.SIDEBAR_CHANGE_TOKEN_WINDOW', 10):
+            sidebar_articles = Article.get_sidebar_articles(
+                playground_root.ids, change_token=change_token, known_ids=known_ids)
+        self.assertIn(playground_children[0].id, [article['id'] for article in sidebar_articles['articles']],
+                      'Should send the article changed by the late transaction')
+
+    @users('employee')
+    def test_article_sidebar_change_sequence(self):
+        """ Check that only the changed articles are written when bumping their
+        sidebar change sequence. """
+        playground_root = self.article_workspace.with_env(self.env)
+        playground_children = self.workspace_children.with_env(self.env)
+        grand_child = self.env['knowledge.article'].create({
+            'name': 'Grand Child', 'parent_id': playground_children[0].id})
+        self.env.cr.precommit.run()
+        articles = playground_root + playground_children + grand_child
+        sequences = {article: article.sidebar_change_sequence for article in articles}
+
+        playground_children[0].name = 'Renamed'
+        self.env.cr.precommit.run()
+        self.assertGreater(playground_children[0].sidebar_change_sequence, sequences[playground_children[0]])
+        self.assertFalse(playground_children[0].sidebar_tree_change_sequence)
+        for article in playground_root + playground_children[1] + grand_child:
+            self.assertEqual(article.sidebar_change_sequence, sequences[article],
+                             'Should not touch the parent, the siblings nor the descendants of a renamed article')
+
     @mute_logger('odoo.addons.base.models.ir_rule', 'odoo.addons.mail.models.mail_mail', 'odoo.models.unlink', 'odoo.tests')
     @users('employee')
     def test_article_invite_members(self):
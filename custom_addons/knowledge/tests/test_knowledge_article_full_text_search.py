@@ -387,3 +387,144 @@ class TestKnowledgeArticleFullTextSearch(KnowledgeCommon):
             'is_user_favorite': False,
             'root_article_id': (self.workspace_article_hidden.id, '📄 HR')
         }])
+
+    @users('employee')
+    def test_get_user_sorted_articles_language_config(self):
+        """ Check that the stemmed text search configurations enabled through
+            the `knowledge.fts_language_configs` parameter allow to find the
+            inflected forms of the search terms. """
+        Article = self.env['knowledge.article']
+        self.env.user.lang = 'en_US'
+        self.assertEqual(Article.get_user_sorted_articles('biscuits', hidden_mode=False), [])
+
+        self.env['ir.config_parameter'].sudo().set_param('knowledge.fts_language_configs', 'english')
+        self.assertEqual(Article._get_fts_search_configs(), ['knowledge_config'],
+                         'Configurations should only be used once their index is built')
+        Article.sudo()._cron_update_indexes(concurrently=False)
+        self.assertEqual(Article._get_fts_search_configs(), ['knowledge_config', 'english'])
+        self.assertEqual(
+            [article['id'] for article in Article.get_user_sorted_articles('biscuits', hidden_mode=False)],
+            [self.workspace_child_article_visible.id])
+
+        # unknown or unsupported configurations are ignored
+        self.env['ir.config_parameter'].sudo().set_param('knowledge.fts_language_configs', 'klingon,simple')
+        self.assertEqual(Article._get_fts_search_configs(), ['knowledge_config'])
+
+    @users('admin')
+    def test_get_user_sorted_articles_extended(self):
+        """ Check that the extended search also finds the articles through the
+            comments posted on them and through the properties of the items,
+            and that the results are grouped by article. """
+        Article = self.env['knowledge.article']
+        thread = self.env['knowledge.article.thread'].create({
+            'article_id': self.workspace_article_visible.id,
+            'article_anchor_text': 'Pim\'s are circular',
+        })
+        thread.message_post(body=Markup('<p>Is the hexagonal version coming soon?</p>'), message_type='comment')
+        self.workspace_article_visible.article_properties_definition = [{
+            'name': '28db68689e91de10',
+            'type': 'char',
+            'string': 'Flavor',
+            'default': '',
+        }]
+        item = Article.create({
+            'name': 'Limited edition',
+            'parent_id': self.workspace_article_visible.id,
+            'is_article_item': True,
+            'article_properties': {'28db68689e91de10': 'hexagonal'},
+        })
+
+        results = Article.get_user_sorted_articles_extended('hexagonal')
+        self.assertEqual({result['id'] for result in results}, {self.workspace_article_visible.id, item.id})
+        results_by_id = {result['id']: result for result in results}
+        self.assertEqual(results_by_id[self.workspace_article_visible.id]['matches'], ['comment'])
+        self.assertEqual(results_by_id[self.workspace_article_visible.id]['thread_ids'], [thread.id])
+        self.assertEqual(results_by_id[item.id]['matches'], ['property'])
+
+        # matches on several sources are grouped and ranked first
+        results = Article.get_user_sorted_articles_extended('circular')
+        self.assertEqual(results[0]['id'], self.workspace_article_visible.id)
+        self.assertEqual(results[0]['matches'], ['body', 'comment'])
+        self.assertEqual(len(results), 1)
+
+        # an article matching with its title and its body matches with both
+        results_by_id = {result['id']: result for result in Article.get_user_sorted_articles_extended("Pim's")}
+        self.assertEqual(results_by_id[self.workspace_article_visible.id]['matches'], ['body', 'comment', 'title'])
+        self.assertEqual(results_by_id[self.workspace_child_article_visible.id]['matches'], ['body'])
+
+        # all the sources share the same candidate budget
+        self.env['ir.config_parameter'].sudo().set_param('knowledge.fts_search_cut_off', 1)
+        results = Article.get_user_sorted_articles_extended('circular', limit=1)
+        self.assertEqual(results[0]['matches'], ['body'])
+
+    @users('admin')
+    def test_get_user_sorted_articles_facets(self):
+        """ Check that the facet counts are computed on all the selected
+            candidates, alongside the ranked articles. """
+        Article = self.env['knowledge.article']
+        result = Article.get_user_sorted_articles("Pim's", limit=1, hidden_mode=False, with_facets=True)
+        self.assertEqual([article['id'] for article in result['articles']], [self.workspace_article_visible.id])
+        self.assertEqual(dict(result['facets']['category']), {'workspace': 2, 'shared': 1, 'private': 1})
+        self.assertEqual(dict(result['facets']['root_article_id']), {
+            (self.workspace_article_visible.id, "📄 10 unknown facts about Pim's"): 2,
+            (self.shared_article.id, '📄 TODO list'): 1,
+            (self.private_article_admin.id, "📄 My favorite Pim's flavors"): 1,
+        })
+        self.assertEqual(dict(result['facets']['is_user_favorite']), {True: 1, False: 3})
+        self.assertEqual(dict(result['facets']['is_article_item']), {False: 4})
+        self.assertFalse(result['facets_truncated'])
+
+        # the counts are capped by the number of candidates
+        self.env['ir.config_parameter'].sudo().set_param('knowledge.fts_search_cut_off', 2)
+        result = Article.get_user_sorted_articles("Pim's", limit=1, hidden_mode=False, with_facets=True)
+        self.assertEqual(sum(dict(result['facets']['category']).values()), 2)
+        self.assertTrue(result['facets_truncated'])
+
+        result = Article.get_user_sorted_articles('unmatched terms', hidden_mode=False, with_facets=True)
+        self.assertEqual(result, {
+            'articles': [],
+            'facets': {'category': [], 'root_article_id': [], 'is_user_favorite': [], 'is_article_item': []},
+            'facets_truncated': False,
+        })
+
+    @users('admin')
+    def test_get_user_sorted_articles_pagination(self):
+        """ Check that paginating the results with a cursor returns the same
+            articles, in the same order, as a single search. """
+        Article = self.env['knowledge.article']
+        all_ids = [article['id'] for article in Article.get_user_sorted_articles("Pim's", hidden_mode=False)]
+        self.assertEqual(len(all_ids), 4)
+
+        first_page = Article.get_user_sorted_articles("Pim's", limit=2, hidden_mode=False, cursor=[])
+        self.assertEqual([article['id'] for article in first_page['articles']], all_ids[:2])
+        self.assertTrue(first_page['next_cursor'])
+
+        second_page = Article.get_user_sorted_articles(
+            "Pim's", limit=2, hidden_mode=False, cursor=first_page['next_cursor'])
+        self.assertEqual([article['id'] for article in second_page['articles']], all_ids[2:])
+
+        last_page = Article.get_user_sorted_articles(
+            "Pim's", limit=2, hidden_mode=False, cursor=second_page['next_cursor'])
+        self.assertEqual(last_page, {'articles': [], 'next_cursor': False})
+
+    @users('admin')
+    def test_get_user_sorted_articles_pagination_cut_off(self):
+        """ Check that the pagination goes through all the matching articles,
+            without duplicates, even when there are more of them than the
+            search cut off. """
+        Article = self.env['knowledge.article']
+        all_ids = [article['id'] for article in Article.get_user_sorted_articles("Pim's", hidden_mode=False)]
+        self.assertEqual(len(all_ids), 4)
+
+        self.env['ir.config_parameter'].sudo().set_param('knowledge.fts_search_cut_off', 1)
+        paginated_ids, cursor = [], []
+        for _page in range(len(all_ids)):
+            page = Article.get_user_sorted_articles("Pim's", limit=1, hidden_mode=False, cursor=cursor)
+            self.assertEqual(len(page['articles']), 1)
+            self.assertNotIn('facets', page)
+            paginated_ids += [article['id'] for article in page['articles']]
+            cursor = page['next_cursor']
+        self.assertEqual(paginated_ids, all_ids)
+
+        last_page = Article.get_user_sorted_articles("Pim's", limit=1, hidden_mode=False, cursor=cursor)
+        self.assertEqual(last_page, {'articles': [], 'next_cursor': False})
@@ -1,13 +1,22 @@
 # -*- coding: utf-8 -*-
 # Part of Odoo. See LICENSE file for full copyright and licensing details.
 
+import base64
+import io
+import json
+import zipfile
+
 from datetime import datetime, timedelta
 from freezegun import freeze_time
+from lxml import html
+from unittest.mock import patch
+from urllib.parse import quote
 
-from odoo import exceptions
+from odoo import exceptions, fields
 from odoo.addons.knowledge.tests.common import KnowledgeCommonWData
+from odoo.addons.mail.tests.common import mail_new_test_user
 from odoo.tests.common import tagged, users
-from odoo.tools import mute_logger
+from odoo.tools import html_sanitize, mute_logger, SQL
 
 
 @tagged('knowledge_internals')
@@ -63,6 +72,67 @@ class TestKnowledgeArticleFields(KnowledgeCommonWData):
         self.assertTrue(article_favorites[0].is_article_active)
         self.assertTrue(article_favorites[1].is_article_active)
 
+    @users('employee')
+    def test_favorites_resequence(self):
+        """ Test the favorites resequencing: sequences are spread on the first
+        reorder, then only the moved favorite is updated. """
+        playground_articles = (self.article_workspace + self.workspace_children).with_env(self.env)
+        for article in playground_articles:
+            article.action_toggle_favorite()
+        favorites = self.env['knowledge.article.favorite'].search([('user_id', '=', self.env.uid)])
+        self.assertEqual(favorites.mapped('sequence'), [1, 2, 3])
+
+        # no room before the first favorite: everything is renumbered
+        Favorite = self.env['knowledge.article.favorite']
+        Favorite.resequence_favorites(playground_articles[2:].ids + playground_articles[:2].ids)
+        self.assertEqual(playground_articles.mapped('user_favorite_sequence'), [200, 300, 100])
+
+        # only the moved favorite gets a new sequence, between its neighbours
+        Favorite.resequence_favorites(playground_articles[1:].ids + playground_articles[:1].ids)
+        self.assertEqual(playground_articles.mapped('user_favorite_sequence'), [200, 50, 100])
+
+        # unknown articles are ignored, order is kept
+        Favorite.resequence_favorites([self.article_shared.id] + playground_articles[1:].ids + playground_articles[:1].ids)
+        self.assertEqual(playground_articles.mapped('user_favorite_sequence'), [200, 50, 100])
+
+    @users('admin')
+    def test_favorites_count(self):
+        """ Test the favorite count is kept up to date when favorites are
+        added, moved or removed. """
+        child1, child2 = self.workspace_children.with_env(self.env)
+        self.assertEqual((child1 + child2).mapped('favorite_count'), [0, 0])
+
+        favorites = self.env['knowledge.article.favorite'].create([{
+            'user_id': user_id,
+            'article_id': child1.id,
+        } for user_id in (self.user_employee | self.user_employee2 | self.user_employee_manager).ids])
+        self.assertEqual((child1 + child2).mapped('favorite_count'), [3, 0])
+
+        favorites[0].write({'article_id': child2.id})
+        self.assertEqual((child1 + child2).mapped('favorite_count'), [2, 1])
+
+        child2.action_toggle_favorite()
+        self.assertEqual(child2.favorite_count, 2)
+        child2.action_toggle_favorite()
+        self.assertEqual(child2.favorite_count, 1)
+        child1.with_user(self.user_employee).action_toggle_favorite()
+        self.assertEqual(child1.favorite_count, 3)
+
+        favorites[1:].unlink()
+        self.assertEqual(child1.favorite_count, 1)
+        self.env.flush_all()
+        self.env.cr.execute("SELECT favorite_count FROM knowledge_article WHERE id = %s", (child1.id,))
+        self.assertEqual(self.env.cr.fetchone()[0], 1)
+
+        # the favorites of a deleted user are removed with it
+        user = mail_new_test_user(self.env, groups='base.group_user', login='deleted_employee')
+        self.env['knowledge.article.favorite'].create([
+            {'user_id': user.id, 'article_id': article.id} for article in child1 + child2
+        ])
+        self.assertEqual((child1 + child2).mapped('favorite_count'), [2, 2])
+        user.unlink()
+        self.assertEqual((child1 + child2).mapped('favorite_count'), [1, 1])
+
     @users('employee')
     def test_fields_edition(self):
         _reference_dt = datetime(2022, 5, 31, 10, 0, 0)
@@ -108,6 +178,48 @@ class TestKnowledgeArticleFields(KnowledgeCommonWData):
             else:
                 self.assertFalse(article.html_field_history)
 
+    @users('employee')
+    def test_body_history_compaction(self):
+        _reference_dt = datetime(2024, 1, 31, 12, 0, 0)
+        article = self.env['knowledge.article'].create({
+            'body': '<p>Initial</p>',
+            'internal_permission': 'write',
+            'name': 'Busy Article',
+        })
+        for index, edition_dt in enumerate([
+            _reference_dt - timedelta(days=40, hours=2),  # daily snapshots
+            _reference_dt - timedelta(days=40, hours=1),
+            _reference_dt - timedelta(days=10, minutes=50),  # hourly snapshots
+            _reference_dt - timedelta(days=10, minutes=10),
+            _reference_dt - timedelta(days=9, hours=23),
+            _reference_dt - timedelta(hours=1),  # recent revisions
+        ], start=1):
+            self.patch(self.env.cr, 'now', lambda edition_dt=edition_dt: edition_dt)
+            article.write({'body': f'<p>{f"Version {index} " * 100}</p>'})
+        self.assertEqual([revision['revision_id'] for revision in article.html_field_history['body']], [6, 5, 4, 3, 2, 1])
+        content_by_revision_id = {
+            revision_id: article.html_field_history_get_content_at_revision('body', revision_id)
+            for revision_id in range(1, 7)
+        }
+
+        self.patch(self.env.cr, 'now', lambda: _reference_dt)
+        article._compact_body_history()
+        revisions = article.html_field_history['body']
+        self.assertEqual([revision['revision_id'] for revision in revisions], [6, 5, 4, 2],
+            'Should keep the recent revisions and one revision per hour or per day for older ones')
+        self.assertEqual(
+            [revision['patch'].startswith('zlib:') for revision in revisions], [False, True, True, True],
+            'Should compress the patches of the thinned revisions')
+        for revision_id in (6, 5, 4, 2):
+            self.assertEqual(
+                article.html_field_history_get_content_at_revision('body', revision_id),
+                content_by_revision_id[revision_id])
+
+        self.env['ir.config_parameter'].sudo().set_param('knowledge.knowledge_article_history_limit', 2)
+        article._compact_body_history()
+        self.assertEqual([revision['revision_id'] for revision in article.html_field_history['body']], [6, 5])
+        self.assertEqual(article.html_field_history_get_content_at_revision('body', 5), content_by_revision_id[5])
+
 
 @tagged('knowledge_internals')
 class TestKnowledgeArticleInternals(KnowledgeCommonWData):
@@ -191,6 +303,29 @@ class TestKnowledgeArticleInternals(KnowledgeCommonWData):
             self.assertEqual(new_article.name, expected_name)
             self.assertEqual(new_article.icon, expected_icon)
 
+    @users('employee')
+    def test_search_order_is_user_favorite(self):
+        """ Test ordering on is_user_favorite, keeping the other ordering
+        items, the offset and the limit. """
+        KnowledgeArticle = self.env['knowledge.article']
+        playground_articles = (self.article_workspace + self.workspace_children).with_env(self.env)
+        (playground_articles[1] + playground_articles[2]).action_toggle_favorite()
+        domain = [('id', 'in', playground_articles.ids)]
+
+        self.assertEqual(
+            KnowledgeArticle.search(domain, order='is_user_favorite desc, id desc'),
+            playground_articles[2] + playground_articles[1] + playground_articles[0])
+        self.assertEqual(
+            KnowledgeArticle.search(domain, order='is_user_favorite desc, id desc', offset=1, limit=2),
+            playground_articles[1] + playground_articles[0])
+        self.assertEqual(
+            KnowledgeArticle.search(domain, order='is_user_favorite asc, id', limit=2),
+            playground_articles[0] + playground_articles[1])
+        # favorites of other users are not taken into account
+        self.assertEqual(
+            KnowledgeArticle.with_user(self.user_employee2).search(domain, order='is_user_favorite desc, id'),
+            playground_articles)
+
 
 @tagged('knowledge_internals')
 class TestKnowledgeArticleUtilities(KnowledgeCommonWData):
@@ -205,6 +340,286 @@ class TestKnowledgeArticleUtilities(KnowledgeCommonWData):
             'parent_id': cls.article_workspace.id
         })
 
+    @users('employee')
+    def test_article_body_sanitize_cache(self):
+        article = self.env['knowledge.article'].create({'name': 'Sanitized'})
+        uid = self.env.uid
+        body = (f'<h1>Title {uid}</h1><p onclick="alert(1)">First paragraph {uid}</p>'
+                f'<p>Second paragraph {uid}<script>alert(2)</script></p>')
+        sanitized_body = f'<h1>Title {uid}</h1><p>First paragraph {uid}</p><p>Second paragraph {uid}</p>'
+
+        # the body is sanitized once, when written, and not again when flushed
+        stats = article._get_body_sanitize_cache_stats()
+        with patch('odoo.fields.html_sanitize', wraps=html_sanitize) as mock_html_sanitize:
+            article.write({'body': body})
+            article.flush_recordset(['body'])
+        self.assertEqual(mock_html_sanitize.call_count, 1)
+        self.assertEqual(article.body, sanitized_body)
+        self.env.cr.execute("SELECT body FROM knowledge_article WHERE id = %s", [article.id])
+        self.assertEqual(self.env.cr.fetchone()[0], sanitized_body)
+        new_stats = article._get_body_sanitize_cache_stats()
+        self.assertEqual(new_stats['misses'] - stats['misses'], 1)
+
+        # saving the same body again does not sanitize it again
+        with patch('odoo.fields.html_sanitize', wraps=html_sanitize) as mock_html_sanitize:
+            article.write({'body': f'<p>Other {uid}</p>'})
+            article.write({'body': body})
+            article.flush_recordset(['body'])
+        self.assertEqual(mock_html_sanitize.call_count, 1, 'Should only sanitize the other body')
+        self.assertEqual(article.body, sanitized_body)
+
+    @users('employee')
+    def test_article_body_sanitize_cache_equivalence(self):
+        """ Check that the bodies are sanitized as by a standard html field. """
+        article = self.env['knowledge.article'].create({'name': 'Sanitized'})
+        body_field = article._fields['body']
+        for body in [
+            '<p>Unclosed <b>bold <i>italic</p><p>Next',
+            '<pre>Code <pre>nested</pre> <script>alert(1)</script></pre>',
+            'Text <!-- comment <p>not a block</p> --> between <p>blocks</p> text',
+            '<div><p>Open</div></p><img src="x" onerror="alert(2)">',
+        ]:
+            article.write({'body': body})
+            self.assertEqual(article.body, fields.Html._convert(body_field, body, article, True))
+            article.flush_recordset(['body'])
+            self.env.cr.execute("SELECT body FROM knowledge_article WHERE id = %s", [article.id])
+            self.assertEqual(self.env.cr.fetchone()[0], article.body)
+
+    @users('employee')
+    def test_article_get_embedded_views_data(self):
+        article = self.article_workspace.with_env(self.env)
+        items = self.env['knowledge.article'].search([('parent_id', '=', article.id), ('is_article_item', '=', True)])
+        self.assertTrue(items)
+        embedded_views = [{
+            'id': 'list',
+            'res_model': 'knowledge.article',
+            'view_type': 'list',
+            'domain': [('parent_id', '=', article.id), ('is_article_item', '=', True)],
+            'context': {'active_id': article.id, 'default_is_article_item': True},
+            'specification': {'name': {}},
+        }, {
+            'id': 'kanban',
+            'res_model': 'knowledge.article',
+            'view_type': 'kanban',
+            'domain': [('parent_id', '=', article.id), ('is_article_item', '=', True)],
+            'groupby': ['stage_id'],
+        }, {
+            'id': 'forbidden',
+            'res_model': 'ir.config_parameter',
+            'view_type': 'list',
+            'domain': [],
+            'specification': {'key': {}},
+        }, {
+            'id': 'invalid',
+            'res_model': 'knowledge.article',
+            'view_type': 'list',
+            'domain': [('unknown_field', '=', 1)],
+            'specification': {'name': {}},
+        }]
+        embedded_views_data = article.get_embedded_views_data(embedded_views)
+        self.assertEqual(embedded_views_data['list']['data']['length'], len(items))
+        self.assertEqual(
+            sorted(record['id'] for record in embedded_views_data['list']['data']['records']), sorted(items.ids))
+        self.assertEqual(
+            sum(group['stage_id_count'] for group in embedded_views_data['kanban']['data']['groups']), len(items))
+        self.assertEqual(list(embedded_views_data['forbidden']), ['error'])
+        self.assertEqual(list(embedded_views_data['invalid']), ['error'])
+
+        with self.assertRaises(exceptions.AccessError):
+            self.article_private_manager.with_env(self.env).get_embedded_views_data(embedded_views)
+
+    @users('employee')
+    def test_article_export_subtree(self):
+        root = self.env['knowledge.article'].create({
+            'name': 'Root',
+            'body': '<p>Hello <b>world</b></p><ul><li>one</li><li>two</li></ul>',
+        })
+        child = self.env['knowledge.article'].create({'name': 'Child/1', 'parent_id': root.id})
+        attachment = self.env['ir.attachment'].create({
+            'name': 'notes.txt',
+            'raw': b'notes',
+            'res_model': 'knowledge.article',
+            'res_id': child.id,
+        })
+        child.write({'body': f'<p><a href="/web/content/{attachment.id}?download=true">notes</a></p>'})
+        grandchild = self.env['knowledge.article'].create({
+            'name': 'Grandchild',
+            'parent_id': child.id,
+            'body': '<p>Bottom</p>',
+        })
+        root_path = f'Root ({root.id})'
+        child_path = f'{root_path}/Child_1 ({child.id})'
+        grandchild_path = f'{child_path}/Grandchild ({grandchild.id})'
+
+        fileobj = io.BytesIO()
+        self.assertFalse(root._export_subtree(fileobj, export_format='markdown'))
+        with zipfile.ZipFile(fileobj) as archive:
+            self.assertEqual(sorted(archive.namelist()), sorted([
+                f'{root_path}.md',
+                f'{child_path}.md',
+                f'{child_path}/{attachment.id}-notes.txt',
+                f'{grandchild_path}.md',
+            ]))
+            self.assertEqual(archive.read(f'{root_path}.md').decode(), '# Root\n\nHello **world**\n\n- one\n- two\n')
+            self.assertIn(
+                f'[notes]({quote(f"Child_1 ({child.id})")}/{attachment.id}-notes.txt)',
+                archive.read(f'{child_path}.md').decode())
+            self.assertEqual(archive.read(f'{child_path}/{attachment.id}-notes.txt'), b'notes')
+
+        # huge subtrees are exported in several archives
+        fileobj = io.BytesIO()
+        cursor = root._export_subtree(fileobj, export_format='html', limit=2)
+        self.assertTrue(cursor)
+        with zipfile.ZipFile(fileobj) as archive:
+            self.assertEqual(
+                sorted(name for name in archive.namelist() if name.endswith('.html')),
+                sorted([f'{root_path}.html', f'{child_path}.html']))
+        fileobj = io.BytesIO()
+        self.assertFalse(root._export_subtree(fileobj, export_format='html', cursor=cursor, limit=2))
+        with zipfile.ZipFile(fileobj) as archive:
+            self.assertEqual(archive.namelist(), [f'{grandchild_path}.html'])
+            self.assertIn('<h1>Grandchild</h1><p>Bottom</p>', archive.read(f'{grandchild_path}.html').decode())
+
+        with self.assertRaises(exceptions.ValidationError):
+            root._export_subtree(io.BytesIO(), export_format='pdf')
+
+    @users('employee')
+    def test_article_extract_inline_images(self):
+        image = 'iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR42mNkYPhfDwAChwGA60e6kgAAAABJRU5ErkJggg=='
+        inline_image = f'<img src="data:image/png;base64,{image}">'
+        article = self.env['knowledge.article'].create({
+            'name': 'Screenshots',
+            'body': f'<p>{inline_image}</p><p>{inline_image}</p>',
+        })
+        attachment = self.env['ir.attachment'].sudo().search([
+            ('res_model', '=', 'knowledge.article'), ('res_id', '=', article.id)])
+        self.assertEqual(len(attachment), 1, 'Same images should share their attachment')
+        self.assertEqual(attachment.raw, base64.b64decode(image))
+        url = f'/web/image/{attachment.id}?access_token={attachment.access_token}'
+        self.assertNotIn('data:image', article.body)
+        self.assertEqual(article.body.count(url), 2)
+
+        article.write({'body': f'<p>{inline_image}</p><p>Added</p>'})
+        self.assertEqual(self.env['ir.attachment'].sudo().search_count([
+            ('res_model', '=', 'knowledge.article'), ('res_id', '=', article.id)]), 1,
+            'Already attached images should be reused')
+        self.assertIn(url, article.body)
+
+        # each article gets its own attachment
+        other_article = self.env['knowledge.article'].create({'name': 'Other Screenshots'})
+        (article + other_article).write({'body': f'<p>{inline_image}</p>'})
+        for written_article in article + other_article:
+            attachment = self.env['ir.attachment'].sudo().search([
+                ('res_model', '=', 'knowledge.article'), ('res_id', '=', written_article.id)])
+            self.assertEqual(len(attachment), 1)
+            self.assertEqual(written_article.body, f'<p><img src="/web/image/{attachment.id}?access_token={attachment.access_token}"></p>')
+        self.assertFalse(self.env['ir.attachment'].sudo().search_count([
+            ('res_model', '=', 'knowledge.article'), ('res_id', '=', False)]),
+            'Should not create attachments without article')
+
+        # existing bodies are migrated
+        self.env.flush_all()
+        self.env.cr.execute(
+            "UPDATE knowledge_article SET body = %s WHERE id = %s",
+            (f'<p>Old {inline_image}</p>', article.id))
+        article.invalidate_recordset(['body'])
+        self.env['knowledge.article']._extract_inline_images_from_bodies()
+        self.assertEqual(article.body, f'<p>Old <img src="{url}"></p>')
+        self.assertEqual(article.body_size, len(article.body.encode()))
+
+        # bodies only mentioning inline images are left untouched
+        self.env.cr.execute(
+            "UPDATE knowledge_article SET body = %s, body_size = 0 WHERE id = %s",
+            ('<p>Paste data:image/png URLs</p>', other_article.id))
+        other_article.invalidate_recordset(['body', 'body_size'])
+        self.env['knowledge.article']._extract_inline_images_from_bodies()
+        self.assertEqual(other_article.body_size, 0, 'Should not rewrite the unchanged bodies')
+
+    @users('employee')
+    def test_article_links(self):
+        target, other_target = self.env['knowledge.article'].create([{'name': 'Target'}, {'name': 'Other Target'}])
+        embedded_props = json.dumps({'viewProps': {'context': {'active_id': other_target.id, 'default_is_article_item': True}}})
+        article = self.env['knowledge.article'].create({
+            'name': 'Source',
+            'body': f"""
+                <p><a class="o_knowledge_article_link" href="/knowledge/article/{target.id}" data-res_id="{target.id}">Target</a></p>
+                <div data-embedded="view" data-embedded-props='{embedded_props}'></div>
+            """,
+        })
+        ArticleLink = self.env['knowledge.article.link'].sudo()
+        links = ArticleLink.search([('source_article_id', '=', article.id)])
+        self.assertEqual(
+            sorted((link.target_article_id, link.kind) for link in links),
+            sorted([(target, 'link'), (other_target, 'embedded_view')]))
+        self.assertEqual([backlink['id'] for backlink in target.get_backlinks()], article.ids)
+        self.assertFalse(self.article_shared.with_env(self.env).get_backlinks())
+
+        article.write({'body': f'<p><a class="o_knowledge_article_link" data-res_id="{target.id}">Target</a></p>'})
+        links = ArticleLink.search([('source_article_id', '=', article.id)])
+        self.assertEqual(links.target_article_id, target)
+        self.assertFalse(other_target.get_backlinks())
+
+        # backlinks are limited to the accessible articles
+        private_article = self.env['knowledge.article'].create({
+            'name': 'Private Source',
+            'internal_permission': 'none',
+            'article_member_ids': [(0, 0, {'partner_id': self.env.user.partner_id.id, 'permission': 'write'})],
+            'body': f'<p><a class="o_knowledge_article_link" data-res_id="{target.id}">Target</a></p>',
+        })
+        self.assertEqual(len(target.get_backlinks()), 2)
+        self.assertEqual(
+            [backlink['id'] for backlink in target.with_user(self.user_employee2).get_backlinks()], article.ids)
+
+        # links to deleted articles are kept as broken links
+        target.sudo().unlink()
+        links = ArticleLink.search([('source_article_id', 'in', (article + private_article).ids)])
+        self.assertEqual(len(links), 2)
+        self.assertFalse(links.target_article_id)
+
+    @users('employee')
+    def test_article_copy_references(self):
+        def embedded_view(article_id):
+            embedded_props = json.dumps({'viewProps': {
+                'view_type': 'kanban',
+                'context': {'active_id': article_id, 'default_parent_id': article_id, 'default_is_article_item': True},
+            }})
+            return f"<div data-embedded='view' data-embedded-props='{embedded_props}'></div>"
+
+        other_article = self.article_workspace.with_env(self.env)
+        article = self.env['knowledge.article'].create({
+            'name': 'Article',
+            'body': f'<p>Hello</p>{embedded_view(other_article.id)}',
+        })
+        stages = self.env['knowledge.article.stage'].create([{
+            'name': 'New',
+            'sequence': 1,
+            'parent_id': article.id,
+        }, {
+            'name': 'Done',
+            'sequence': 2,
+            'fold': True,
+            'parent_id': article.id,
+        }])
+
+        # the body does not reference the article items of the article: it is
+        # copied as is, without being parsed
+        with patch.object(html, 'fragment_fromstring', wraps=html.fragment_fromstring) as mock_fragment_fromstring:
+            copied_article = self.env['knowledge.article'].create({'name': 'Copy', 'body': article.body})
+            mock_fragment_fromstring.reset_mock()
+            copied_article._update_article_references(article)
+            mock_fragment_fromstring.assert_not_called()
+        self.assertEqual(copied_article.body, article.body)
+
+        article.write({'body': f'<p>Hello</p>{embedded_view(article.id)}'})
+        new_article = article.action_make_private_copy()
+        self.assertIn(f'"active_id": {new_article.id}', new_article.body)
+        links = self.env['knowledge.article.link'].sudo().search([('source_article_id', '=', new_article.id)])
+        self.assertEqual(links.target_article_id, new_article)
+        new_stages = self.env['knowledge.article.stage'].search([('parent_id', '=', new_article.id)])
+        self.assertEqual(
+            [(stage.name, stage.sequence, stage.fold) for stage in new_stages],
+            [(stage.name, stage.sequence, stage.fold) for stage in stages])
+
     @users('employee')
     def test_article_get_valid_parent_options(self):
         child_writable_article = self.workspace_children[1].with_env(self.env)
@@ -260,6 +675,194 @@ class TestKnowledgeArticleUtilities(KnowledgeCommonWData):
         self.assertEqual(list((article_8 | article_4)._get_ancestor_ids()), [article_4.id, article_2.id])
         self.assertEqual(list((article_8 | article_11)._get_ancestor_ids()), [article_4.id, article_2.id, article_6.id])
 
+    @users('employee')
+    def test_article_name_search_ranking(self):
+        if not self.env.registry.has_trigram:
+            self.skipTest('Ranking by similarity requires the pg_trgm extension')
+
+        # most recent articles come first in the default order
+        notes, meeting_notes, old_notes = self.env['knowledge.article'].create([
+            {'name': 'Notes', 'icon': '📝'},
+            {'name': 'Meeting Notes'},
+            {'name': 'Notes from the 2019 offsite, archived'},
+        ])
+        self.assertEqual(
+            self.env['knowledge.article'].name_search('notes', limit=3),
+            [(article.id, article.display_name) for article in notes + meeting_notes + old_notes],
+            'Should rank the articles by similarity of their name with the searched text')
+        self.assertEqual(
+            self.env['knowledge.article'].name_search('📝 notes', limit=3),
+            [(notes.id, notes.display_name)])
+
+        options = self.workspace_children[1].with_env(self.env).get_valid_parent_options(search_term='notes')
+        self.assertEqual([option['id'] for option in options], (notes + meeting_notes + old_notes).ids)
+        self.assertEqual(
+            self.env['knowledge.article'].name_search('notes', domain=[('id', '!=', notes.id)], limit=3),
+            [(article.id, article.display_name) for article in meeting_notes + old_notes],
+            'Should restrict the ranked articles to the given domain')
+
+    @users('employee')
+    def test_article_name_search_fallback(self):
+        notes, meeting_notes = self.env['knowledge.article'].create([
+            {'name': 'Notes', 'icon': '📝'},
+            {'name': 'Meeting Notes'},
+        ])
+        Article = self.env['knowledge.article']
+        all_articles = Article.search([])
+        self.assertEqual(
+            [article_id for article_id, _name in Article.name_search(domain=[('id', 'in', all_articles.ids)], limit=None)],
+            all_articles.ids,
+            'Should return all the articles of the domain in the default order without searched text')
+        self.assertEqual(
+            Article.name_search('Meeting Notes', domain=[('id', 'in', (notes + meeting_notes).ids)], operator='='),
+            [(meeting_notes.id, meeting_notes.display_name)])
+        self.assertEqual(
+            Article.name_search('notes', domain=[('id', 'in', (notes + meeting_notes).ids)], operator='not ilike'),
+            [])
+        with patch.object(self.env.registry, 'has_trigram', False):
+            self.assertEqual(
+                Article.name_search('notes', domain=[('id', 'in', (notes + meeting_notes).ids)]),
+                [(article.id, article.display_name) for article in meeting_notes + notes],
+                'Should fall back on the default order without pg_trgm')
+
+    @users('employee')
+    def test_article_properties_indexes(self):
+        def get_index_names(article):
+            self.env.cr.execute(
+                "SELECT indexname FROM pg_indexes WHERE tablename = 'knowledge_article' AND indexname LIKE %s",
+                [f'knowledge\\_article\\_\\_properties\\_{article.id}\\_%'])
+            return sorted(index_name for index_name, in self.env.cr.fetchall())
+
+        def update_indexes():
+            self.env['knowledge.article'].sudo()._cron_update_indexes(concurrently=False)
+
+        article = self.env['knowledge.article'].create({'name': 'Items Database'})
+        article.article_properties_definition = [{
+            'name': 'status', 'type': 'selection', 'string': 'Status',
+            'selection': [['todo', 'To Do'], ['done', 'Done']],
+        }, {
+            'name': 'labels', 'type': 'tags', 'string': 'Labels', 'tags': [],
+        }, {
+            'name': 'notes', 'type': 'text', 'string': 'Notes',
+        }]
+        status_index_name = f'knowledge_article__properties_{article.id}_status_selection_index'
+        with patch('odoo.addons.knowledge.models.knowledge_article.ARTICLE_PROPERTIES_INDEX_MIN_ITEMS', 20):
+            update_indexes()
+            self.assertFalse(get_index_names(article), 'Should not index the properties of a few items')
+
+            self.env['knowledge.article'].create([{
+                'name': f'Item {index}',
+                'parent_id': article.id,
+                'is_article_item': True,
+                'article_properties': {'status': 'done' if index == 0 else 'todo'},
+            } for index in range(50)])
+            with patch('odoo.addons.knowledge.models.knowledge_article.ARTICLE_PROPERTIES_INDEX_LIMIT', 1):
+                update_indexes()
+                self.assertEqual(len(get_index_names(article)), 1, 'Should not create more indexes than the limit')
+            update_indexes()
+            self.assertEqual(get_index_names(article), [
+                f'knowledge_article__properties_{article.id}_labels_tags_index',
+                status_index_name,
+            ], 'Should index the values of the properties that can be filtered, not the texts')
+
+            # the domains on the properties of the items use the indexes
+            self.env.cr.execute("ANALYZE knowledge_article")
+            self.env.cr.execute("SET enable_seqscan = off")
+            try:
+                query = self.env['knowledge.article'].sudo()._search([
+                    ('parent_id', '=', article.id),
+                    ('article_properties.status', '=', 'done'),
+                ])
+                self.env.cr.execute(SQL("EXPLAIN %s", query.select()))
+                plan = '\n'.join(line for line, in self.env.cr.fetchall())
+            finally:
+                self.env.cr.execute("RESET enable_seqscan")
+            self.assertIn(status_index_name, plan)
+
+            article.article_properties_definition = [{
+                'name': 'status', 'type': 'char', 'string': 'Status',
+            }]
+            update_indexes()
+            self.assertEqual(get_index_names(article), [
+                f'knowledge_article__properties_{article.id}_status_char_index',
+            ], 'Should drop the indexes of the removed or changed properties')
+
+            article.unlink()
+            update_indexes()
+            self.assertFalse(get_index_names(article))
+
+    @users('employee')
+    def test_article_get_body_blocks(self):
+        article = self.env['knowledge.article'].create({
+            'name': 'Runbook',
+            'body': '<h1>Runbook</h1>' + ''.join(
+                f'<p>Step {index} <strong>important</strong><br>details</p>' for index in range(120)
+            ) + '<ul><li>Done</li></ul>',
+        })
+        self.assertEqual(article.body_size, len(article.body.encode()))
+
+        # read the body by small chunks to check blocks spanning several chunks
+        with patch('odoo.addons.knowledge.models.knowledge_article.BODY_CHUNK_SIZE', 32):
+            result = article.get_body_blocks(limit=50)
+            self.assertEqual(len(result['blocks']), 50)
+            self.assertEqual(result['blocks'][:2], ['<h1>Runbook</h1>', '<p>Step 0 <strong>important</strong><br>details</p>'])
+            self.assertEqual(result['body_size'], article.body_size)
+            blocks = result['blocks']
+            while result['cursor']:
+                result = article.get_body_blocks(cursor=result['cursor'], limit=50)
+                blocks += result['blocks']
+        self.assertEqual(len(blocks), 122)
+        self.assertEqual(blocks[-1], '<ul><li>Done</li></ul>')
+        self.assertEqual(''.join(blocks), article.body.rstrip())
+
+        empty_article = self.env['knowledge.article'].create({'name': 'Empty', 'body': False})
+        self.assertEqual(empty_article.get_body_blocks(), {'blocks': [], 'cursor': False, 'body_size': 0})
+        with self.assertRaises(exceptions.AccessError):
+            self.article_shared.with_user(self.user_employee2).get_body_blocks()
+
+    @users('employee')
+    def test_article_write_body_changes(self):
+        article = self.env['knowledge.article'].create({
+            'name': 'Runbook',
+            'body': '<h1>Runbook</h1><p>First step</p><p>Second step</p>',
+        })
+        base_checksum = article.body_checksum
+        self.assertEqual(article.get_body_blocks()['blocks'], ['<h1>Runbook</h1>', '<p>First step</p>', '<p>Second step</p>'])
+
+        new_checksum = article.write_body_changes(base_checksum, [
+            {'index': 1, 'remove': 1, 'insert': ['<p>First step, updated</p>']},
+            {'index': 3, 'remove': 0, 'insert': ['<p>Third step<script>alert(1)</script></p>']},
+        ])
+        self.assertEqual(article.body, '<h1>Runbook</h1><p>First step, updated</p><p>Second step</p><p>Third step</p>',
+            'Should apply the changes and sanitize the inserted blocks')
+        self.assertEqual(article.body_checksum, new_checksum)
+        self.assertEqual(article.body_size, len(article.body.encode()))
+        self.assertEqual(article.last_edition_uid, self.env.user)
+        self.assertEqual(len(article.html_field_history['body']), 1)
+        self.assertEqual(
+            article.html_field_history_get_content_at_revision('body', 1),
+            '<h1>Runbook</h1><p>First step</p><p>Second step</p>')
+
+        # the fields depending on the body and the links are updated as by ``write``
+        target = self.article_shared.with_env(self.env)
+        new_checksum = article.write_body_changes(new_checksum, [
+            {'index': 4, 'remove': 0, 'insert': [f'<p><a class="o_knowledge_article_link" data-res_id="{target.id}">Shared</a></p>']},
+        ])
+        article.flush_recordset()
+        self.env.cr.execute("SELECT body_size FROM knowledge_article WHERE id = %s", [article.id])
+        self.assertEqual(self.env.cr.fetchone()[0], len(article.body.encode()))
+        self.assertEqual(
+            self.env['knowledge.article.link'].sudo().search([('source_article_id', '=', article.id)]).target_article_id,
+            target)
+
+        with self.assertRaises(exceptions.ValidationError, msg='Changes based on an outdated body should be refused'):
+            article.write_body_changes(base_checksum, [{'index': 0, 'remove': 1, 'insert': []}])
+        with self.assertRaises(exceptions.ValidationError):
+            article.write_body_changes(new_checksum, [{'index': 4, 'remove': 2, 'insert': []}])
+        with self.assertRaises(exceptions.AccessError):
+            self.article_shared.with_user(self.user_employee).write_body_changes(
+                self.article_shared.body_checksum, [{'index': 0, 'remove': 1, 'insert': []}])
+
 
 @tagged('knowledge_internals', 'knowledge_management')
 class TestKnowledgeCommonWDataInitialValue(KnowledgeCommonWData):
@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+# Part of Odoo. See LICENSE file for full copyright and licensing details.
+
+from odoo.addons.knowledge.cli.knowledge_benchmark import KnowledgeBenchmark, KnowledgeCorpusGenerator
+from odoo.addons.knowledge.tests.common import KnowledgeCommon
+from odoo.cli.command import commands
+from odoo.tests.common import tagged
+
+
+@tagged('knowledge_benchmark')
+class TestKnowledgeBenchmark(KnowledgeCommon):
+
+    def test_benchmark_command(self):
+        self.assertIs(commands.get('knowledge_benchmark'), KnowledgeBenchmark)
+
+    def test_corpus_generator(self):
+        generator = KnowledgeCorpusGenerator(vocabulary_size=50, body_words=40, image_ratio=1.0, image_size=30)
+        self.assertEqual(len(generator.vocabulary), 50)
+        self.assertEqual(generator.vocabulary, KnowledgeCorpusGenerator(vocabulary_size=50).vocabulary,
+                         "The vocabulary should only depend on the seed")
+        self.assertEqual(generator.word_at_rank(0), generator.vocabulary[0])
+        self.assertEqual(generator.word_at_rank(100), generator.vocabulary[-1])
+        self.assertTrue(set(generator.words(20)) <= set(generator.vocabulary))
+
+        body = generator.body()
+        self.assertTrue(body.startswith('<h2>') or body.startswith('<p><img'))
+        self.assertIn('<img src="data:image/png;base64,', body)
+
+        queries = generator.default_queries()
+        self.assertEqual(len(queries), 6)
+        self.assertEqual(queries[-1], 'unmatchedterm')
+
+    def test_corpus_search(self):
+        generator = KnowledgeCorpusGenerator(vocabulary_size=50, body_words=40)
+        benchmark = KnowledgeBenchmark()
+        benchmark._generate_corpus(self.env, generator, 3, self.user_admin)
+
+        results = benchmark._run_queries(self.env(user=self.user_admin), [generator.word_at_rank(0)], 2)
+        self.assertEqual(len(results), 2, "The query should run in normal and hidden mode")
+        for result in results:
+            self.assertEqual(len(result['timings']), 2)
+            self.assertTrue(result['plan'])
+        self.assertTrue(results[0]['matches'])
+
+    def test_percentile(self):
+        values = [1, 2, 3, 4, 5, 6, 7, 8, 9, 10]
+        self.assertEqual(KnowledgeBenchmark._percentile(values, 50), 5)
+        self.assertEqual(KnowledgeBenchmark._percentile(values, 90), 9)
+        self.assertEqual(KnowledgeBenchmark._percentile(values, 99), 10)
+        self.assertEqual(KnowledgeBenchmark._percentile(values, 0), 1)
+        self.assertEqual(KnowledgeBenchmark._percentile([42], 95), 42)
@@ -2,6 +2,14 @@
 
 import { KnowledgeSidebar } from "@knowledge/components/sidebar/sidebar";
 import { patch } from "@web/core/utils/patch";
+import { throttleForAnimation } from "@web/core/utils/timing";
+
+import { useRef } from "@odoo/owl";
+
+// Height of a mini icon (36px) and of the gap between two of them (4px)
+export const MINI_ICON_HEIGHT = 40;
+// Number of mini icons rendered above and below the visible ones
+export const MINI_ICONS_OVERSCAN = 10;
 
 /**
  * Patch the KnowledgeSidebar to add collapse-to-icons functionality.
@@ -16,9 +24,14 @@ patch(KnowledgeSidebar.prototype, {
 
         // Add collapsed state
         this.state.sidebarCollapsed = localStorage.getItem(this.storageKeys.collapsed) === "true";
+        this.loadArticles();
 
-        // Build mini-icons list for collapsed mode
-        this.state.miniIcons = [];
+        // Only the mini icons in view are rendered (see getMiniIconsWindow)
+        this.miniIconsRef = useRef("miniIcons");
+        this.state.miniIconsScrollTop = 0;
+        this.onMiniIconsScroll = throttleForAnimation(() => {
+            this.state.miniIconsScrollTop = this.miniIconsRef.el?.scrollTop || 0;
+        });
     },
 
     /**
@@ -27,51 +40,130 @@ patch(KnowledgeSidebar.prototype, {
     toggleCollapse() {
         this.state.sidebarCollapsed = !this.state.sidebarCollapsed;
         localStorage.setItem(this.storageKeys.collapsed, this.state.sidebarCollapsed);
+        if (!this.state.sidebarCollapsed && this.compactArticles) {
+            // Load the whole tree now that it is shown
+            this.loadArticles();
+        }
+    },
+
+    /**
+     * When collapsed, only the root and favorite articles are shown: load
+     * their name, icon and category only. The tree is loaded when expanding
+     * the sidebar.
+     */
+    async loadArticles() {
+        // The load done during the setup of the sidebar is skipped: the
+        // articles are loaded once the collapsed state is restored
+        if (!this.storageKeys.collapsed) {
+            return;
+        }
+        if (!this.state.sidebarCollapsed) {
+            this.compactArticles = false;
+            return super.loadArticles(...arguments);
+        }
+        this.state.loading = true;
+        Object.assign(this.state, {
+            articles: {},
+            favoriteIds: [],
+            workspaceIds: [],
+            sharedIds: [],
+            privateIds: [],
+        });
+        const res = await this.orm.call(
+            this.props.record.resModel,
+            "get_sidebar_articles",
+            [this.props.record.resId],
+            { roots_only: true }
+        );
+        for (const article of res.articles) {
+            this.state.articles[article.id] = { ...article, child_ids: [] };
+            if (!article.parent_id || article.id === res.active_article_accessible_root_id) {
+                this.getCategoryIds(article.category).push(article.id);
+            }
+        }
+        this.state.favoriteIds = res.favorite_ids;
+        this.compactArticles = true;
+        this.state.loading = false;
+        this.updateBusChannels();
+    },
+
+    /**
+     * Children are not loaded while collapsed: don't insert the new or moved
+     * articles under their parent, the tree is reloaded when expanding.
+     */
+    async insertArticle(article, position) {
+        if (this.compactArticles && position.parentId) {
+            return;
+        }
+        return super.insertArticle(...arguments);
+    },
+
+    showArticle(article) {
+        if (!this.compactArticles) {
+            super.showArticle(...arguments);
+        }
     },
 
     /**
      * Get a flat list of root-level articles with their icons for mini mode.
-     * @returns {Array<{id, icon, name, category, fa, isActive}>}
+     * The list is memoized on the lists of root and favorite ids: the items
+     * reference the articles of the state, so that renaming an article or
+     * changing its icon does not require to rebuild the list.
+     * @returns {Array<{id, article, category, fa}>}
      */
     getMiniIcons() {
-        const icons = [];
         const sections = [
             { ids: this.state.workspaceIds || [], category: "workspace", fa: "fa-building" },
             { ids: this.state.sharedIds || [], category: "shared", fa: "fa-users" },
             { ids: this.state.privateIds || [], category: "private", fa: "fa-user" },
+            // Also include favorites
+            { ids: this.state.favoriteIds || [], category: "favorite", fa: "fa-star" },
         ];
+        const key = sections.map((section) => section.ids.join(",")).join("|");
+        if (this.miniIconsCache?.key === key && this.miniIconsCache.articles === this.state.articles) {
+            return this.miniIconsCache.icons;
+        }
+        const icons = [];
+        const addedIds = new Set();
         for (const section of sections) {
             for (const id of section.ids) {
                 const article = this.getArticle(id);
-                if (article) {
+                if (article && !addedIds.has(article.id)) {
+                    addedIds.add(article.id);
                     icons.push({
                         id: article.id,
-                        icon: article.icon || null,
-                        name: article.name || "Untitled",
+                        article,
                         category: section.category,
                         fa: section.fa,
-                        isActive: article.id === this.props.record.resId,
                     });
                 }
             }
         }
-        // Also include favorites
-        for (const id of (this.state.favoriteIds || [])) {
-            const article = this.getArticle(id);
-            if (article && !icons.some(i => i.id === article.id)) {
-                icons.push({
-                    id: article.id,
-                    icon: article.icon || null,
-                    name: article.name || "Untitled",
-                    category: "favorite",
-                    fa: "fa-star",
-                    isActive: article.id === this.props.record.resId,
-                });
-            }
-        }
+        this.miniIconsCache = { key, articles: this.state.articles, icons };
         return icons;
     },
 
+    /**
+     * Get the mini icons to render given the scroll position of the rail, and
+     * the space to leave above and below them to keep the scrollbar height.
+     * @returns {{icons: Array, paddingTop: number, paddingBottom: number}}
+     */
+    getMiniIconsWindow() {
+        const icons = this.getMiniIcons();
+        const height = this.miniIconsRef.el?.clientHeight || window.innerHeight;
+        const scrollTop = this.state.miniIconsScrollTop;
+        const start = Math.max(0, Math.floor(scrollTop / MINI_ICON_HEIGHT) - MINI_ICONS_OVERSCAN);
+        const end = Math.min(
+            icons.length,
+            Math.ceil((scrollTop + height) / MINI_ICON_HEIGHT) + MINI_ICONS_OVERSCAN
+        );
+        return {
+            icons: icons.slice(start, end),
+            paddingTop: start * MINI_ICON_HEIGHT,
+            paddingBottom: (icons.length - end) * MINI_ICON_HEIGHT,
+        };
+    },
+
     /**
      * Handle click on a mini icon in collapsed mode.
      * @param {number} articleId